@@ -0,0 +1,96 @@
+"""
+Numeric rule kernels for batch validation
+
+Evaluated with NumPy; very large batches use a Numba-compiled loop when Numba is installed
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional
+    njit = None
+
+# Columns of the flag matrix returned by eval_numeric_rules
+NET_NEGATIVE = 0        # Rule 7
+TAX_NEGATIVE = 1        # Rule 7
+GROSS_NEGATIVE = 2      # Rule 7
+LINE_SUM_MISMATCH = 3   # Rule 8
+GROSS_MISMATCH = 4      # Rule 9
+GROSS_NOT_POSITIVE = 5  # Rule 12
+GROSS_ABOVE_MAX = 6     # Rule 12
+N_FLAGS = 7
+
+
+def _eval_numeric_rules_loop(net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items,
+                             max_amount, tolerance, rel_tolerance):
+    """
+    Evaluate the amount rules for every invoice, returning an (n, N_FLAGS) int8 matrix
+    
+    has_* are presence masks (a missing amount never triggers a rule). Tolerance checks follow
+    calculate_tolerance_match, so NaN/inf amounts fail them exactly as in the scalar rules.
+    """
+    n = net.shape[0]
+    flags = np.zeros((n, N_FLAGS), dtype=np.int8)
+    for i in range(n):
+        if has_net[i]:
+            flags[i, NET_NEGATIVE] = net[i] < 0
+            if has_items[i]:
+                difference = abs(line_sums[i] - net[i])
+                flags[i, LINE_SUM_MISMATCH] = not (
+                    np.isfinite(difference) and difference <= tolerance + rel_tolerance * abs(net[i])
+                )
+        if has_tax[i]:
+            flags[i, TAX_NEGATIVE] = tax[i] < 0
+        if has_gross[i]:
+            flags[i, GROSS_NEGATIVE] = gross[i] < 0
+            flags[i, GROSS_NOT_POSITIVE] = gross[i] <= 0
+            flags[i, GROSS_ABOVE_MAX] = gross[i] > 0 and gross[i] > max_amount
+            if has_net[i] and has_tax[i]:
+                difference = abs(net[i] + tax[i] - gross[i])
+                flags[i, GROSS_MISMATCH] = not (
+                    np.isfinite(difference) and difference <= tolerance + rel_tolerance * abs(gross[i])
+                )
+    return flags
+
+
+def _within(values1, values2, tolerance, rel_tolerance):
+    """calculate_tolerance_match over arrays"""
+    difference = np.abs(values1 - values2)
+    return np.isfinite(difference) & (difference <= tolerance + rel_tolerance * np.abs(values2))
+
+
+def _eval_numeric_rules_numpy(net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items,
+                              max_amount, tolerance, rel_tolerance):
+    """NumPy equivalent of _eval_numeric_rules_loop"""
+    flags = np.zeros((net.shape[0], N_FLAGS), dtype=np.int8)
+    with np.errstate(invalid="ignore", over="ignore"):  # inf/NaN amounts simply fail the match
+        flags[:, NET_NEGATIVE] = has_net & (net < 0)
+        flags[:, TAX_NEGATIVE] = has_tax & (tax < 0)
+        flags[:, GROSS_NEGATIVE] = has_gross & (gross < 0)
+        flags[:, LINE_SUM_MISMATCH] = has_items & has_net & ~_within(line_sums, net, tolerance, rel_tolerance)
+        flags[:, GROSS_MISMATCH] = has_net & has_tax & has_gross & ~_within(net + tax, gross, tolerance, rel_tolerance)
+        flags[:, GROSS_NOT_POSITIVE] = has_gross & (gross <= 0)
+        flags[:, GROSS_ABOVE_MAX] = has_gross & (gross > 0) & (gross > max_amount)
+    return flags
+
+
+# The compiled loop saves ~20ns per invoice over NumPy but costs ~0.2s (on-disk cache) to ~1.4s
+# (cold) to compile on first use, so it only pays off on batches of several million invoices
+JIT_THRESHOLD = 10_000_000
+
+if njit is not None:
+    # Serial on purpose: the API validates from several threads at once, which Numba's default
+    # parallel threading layer aborts the process on. No fastmath: it would change NaN/inf outcomes
+    _eval_numeric_rules_jit = njit(cache=True)(_eval_numeric_rules_loop)
+else:
+    _eval_numeric_rules_jit = None
+
+
+def eval_numeric_rules(net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items,
+                       max_amount, tolerance, rel_tolerance):
+    """Evaluate the amount rules, see _eval_numeric_rules_loop"""
+    kernel = _eval_numeric_rules_numpy
+    if _eval_numeric_rules_jit is not None and net.shape[0] >= JIT_THRESHOLD:
+        kernel = _eval_numeric_rules_jit
+    return kernel(net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items,
+                  max_amount, tolerance, rel_tolerance)
@@ -1,23 +1,28 @@
 """
 FastAPI HTTP API for invoice validation
 """
-import json
+import asyncio
 import os
+import aiofiles
+from functools import lru_cache
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from typing import List
+from fastapi.responses import ORJSONResponse, Response
+from typing import List, Optional, Tuple
 import tempfile
 from pathlib import Path
+from urllib.parse import quote
 
 from .models import Invoice, ValidationReport
 from .extractor import InvoiceExtractor
 from .validator import InvoiceValidator
+from .utils import write_json, write_json_many
 
 app = FastAPI(
     title="Invoice QC Service API",
     description="Extract and validate invoice data from PDFs",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS for frontend integration
@@ -33,6 +38,86 @@ app.add_middleware(
 OUTPUT_DIR = Path("output")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of uploads written to disk at the same time per request
+MAX_CONCURRENT_UPLOADS = 8
+
+# Number of generated files kept in memory for /download
+DOWNLOAD_CACHE_SIZE = 64
+
+# Directory to cache the text of uploaded PDFs in, so re-uploads skip PDF parsing. Off by default,
+# as it keeps document contents on disk; entries older than TEXT_CACHE_MAX_AGE seconds are deleted
+TEXT_CACHE_DIR: Optional[Path] = None
+TEXT_CACHE_MAX_AGE = 24 * 60 * 60
+
+
+async def _save_upload(file: UploadFile, destination: Path, limiter: asyncio.Semaphore) -> None:
+    """Stream an uploaded file to disk without buffering it whole in memory"""
+    async with limiter:
+        async with aiofiles.open(destination, 'wb') as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await f.write(chunk)
+
+
+@lru_cache(maxsize=DOWNLOAD_CACHE_SIZE)
+def _read_output(path: str, mtime_ns: int, size: int) -> bytes:
+    """Read a file's bytes, cached per (path, mtime, size) so a rewritten file is read again"""
+    return Path(path).read_bytes()
+
+
+def _load_output(filename: str) -> bytes:
+    """
+    Read a generated JSON file from the output directory (or its invoices subdirectory)
+    
+    Results are cached, since clients tend to fetch the same few reports repeatedly.
+    The cache is keyed on the file's mtime and size, so files rewritten outside this
+    process (CLI runs, other workers) are never served stale.
+    Raises FileNotFoundError if the file does not exist (misses are not cached).
+    """
+    file_path = OUTPUT_DIR / filename
+    if not file_path.exists():
+        # Check in invoices subdirectory
+        file_path = OUTPUT_DIR / "invoices" / filename
+    stat = file_path.stat()
+    return _read_output(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _save_all(invoices: List[Invoice], validation_report: ValidationReport) -> Tuple[List[dict], dict, dict]:
+    """
+    Save each invoice, the combined invoice list and the validation report as JSON
+    
+    Every model is dumped exactly once; the returned dicts are reused for the response.
+    """
+    invoices_dict = [inv.model_dump() for inv in invoices]
+    report_dict = validation_report.model_dump()
+    
+    invoices_dir = OUTPUT_DIR / "invoices"
+    invoices_dir.mkdir(exist_ok=True)
+    
+    # Save each invoice as separate JSON
+    filenames = [invoices_dir / f"{inv_dict.get('invoice_number', 'unknown')}.json" for inv_dict in invoices_dict]
+    write_json_many(zip(invoices_dict, filenames))
+    saved_files = [str(filename) for filename in filenames]
+    
+    # Save combined file
+    combined_file = OUTPUT_DIR / "all_invoices.json"
+    write_json(invoices_dict, combined_file)
+    
+    # Save validation report
+    report_file = OUTPUT_DIR / "validation_report.json"
+    write_json(report_dict, report_file)
+    
+    return invoices_dict, report_dict, {
+        "individual_invoices": saved_files,
+        "combined_file": str(combined_file),
+        "validation_report": str(report_file)
+    }
+
 
 @app.get("/health")
 async def health_check():
@@ -47,7 +132,7 @@ async def validate_json(invoices: List[Invoice]):
     """
     try:
         validator = InvoiceValidator()
-        report = validator.validate_invoices(invoices)
+        report = await asyncio.to_thread(validator.validate_invoices, invoices)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation error: {str(e)}")
@@ -74,58 +159,34 @@ async def extract_and_validate_pdfs(
             for file in files:
                 if not file.filename.lower().endswith('.pdf'):
                     raise HTTPException(status_code=400, detail=f"File {file.filename} is not a PDF")
-                
-                file_path = temp_path / file.filename
-                with open(file_path, 'wb') as f:
-                    content = await file.read()
-                    f.write(content)
-            
-            # Extract invoices
-            extractor = InvoiceExtractor()
-            invoices = extractor.extract_from_directory(str(temp_path))
-            
-            # Convert to dict
-            invoices_dict = [inv.model_dump() for inv in invoices]
-            
-            # Save to output directory
-            invoices_dir = OUTPUT_DIR / "invoices"
-            invoices_dir.mkdir(exist_ok=True)
-            
-            saved_files = []
             
-            # Save each invoice as separate JSON
-            for inv_dict in invoices_dict:
-                inv_id = inv_dict.get("invoice_number", "unknown")
-                filename = invoices_dir / f"{inv_id}.json"
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(inv_dict, f, indent=2, ensure_ascii=False)
-                saved_files.append(str(filename))
+            # Uploads are written concurrently, so each gets its own temp name: two uploads
+            # with the same filename must not write into one file (the index also keeps upload order)
+            limiter = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+            await asyncio.gather(*(
+                _save_upload(file, temp_path / f"{index:06d}_{Path(file.filename).name}", limiter)
+                for index, file in enumerate(files)
+            ))
             
-            # Save combined file
-            combined_file = OUTPUT_DIR / "all_invoices.json"
-            with open(combined_file, 'w', encoding='utf-8') as f:
-                json.dump(invoices_dict, f, indent=2, ensure_ascii=False)
+            # Extraction, validation and file writes block, so keep them off the event loop
+            extractor = InvoiceExtractor(text_cache_dir=TEXT_CACHE_DIR, text_cache_max_age=TEXT_CACHE_MAX_AGE)
+            invoices = await asyncio.to_thread(extractor.extract_from_directory, str(temp_path))
             
-            # Validate invoices
             validator = InvoiceValidator()
-            validation_report = validator.validate_invoices(invoices)
+            validation_report = await asyncio.to_thread(validator.validate_invoices, invoices)
             
-            # Save validation report
-            report_file = OUTPUT_DIR / "validation_report.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(validation_report.model_dump(), f, indent=2, ensure_ascii=False)
-            
-            return {
+            invoices_dict, report_dict, saved_files = await asyncio.to_thread(
+                _save_all, invoices, validation_report
+            )
+            # The dicts are already built, so a single orjson body beats streaming them
+            # chunk by chunk (and skips FastAPI's jsonable_encoder pass)
+            return ORJSONResponse({
                 "message": "Processing complete",
-                "total_invoices": len(invoices),
+                "total_invoices": len(invoices_dict),
                 "extracted_invoices": invoices_dict,
-                "validation_report": validation_report.model_dump(),
-                "saved_files": {
-                    "individual_invoices": saved_files,
-                    "combined_file": str(combined_file),
-                    "validation_report": str(report_file)
-                }
-            }
+                "validation_report": report_dict,
+                "saved_files": saved_files
+            })
     
     except HTTPException:
         raise
@@ -136,15 +197,24 @@ async def extract_and_validate_pdfs(
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Download a generated JSON file"""
-    file_path = OUTPUT_DIR / filename
-    if not file_path.exists():
-        # Check in invoices subdirectory
-        file_path = OUTPUT_DIR / "invoices" / filename
-    
-    if not file_path.exists():
+    try:
+        content = await asyncio.to_thread(_load_output, filename)
+    except (FileNotFoundError, IsADirectoryError):
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path, filename=filename, media_type="application/json")
+    # As Starlette's FileResponse: names that are not plain ASCII (or contain quotes) go in RFC 5987 filename*
+    quoted = quote(filename)
+    if quoted != filename:
+        disposition = f"attachment; filename*=utf-8''{quoted}"
+    else:
+        disposition = f'attachment; filename="{filename}"'
+    return Response(content, media_type="application/json", headers={"Content-Disposition": disposition})
+
+
+def _list_json_files(directory: Path) -> List[str]:
+    """Names of the JSON files in a directory, from a single scandir pass (no per-entry stat)"""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(".json") and entry.is_file()]
 
 
 @app.get("/invoices")
@@ -154,10 +224,10 @@ async def list_invoices():
     if not invoices_dir.exists():
         return {"invoices": []}
     
-    files = list(invoices_dir.glob("*.json"))
+    names = await asyncio.to_thread(_list_json_files, invoices_dir)
     return {
-        "invoices": [f.name for f in files],
-        "count": len(files)
+        "invoices": names,
+        "count": len(names)
     }
 
 
@@ -179,5 +249,13 @@ async def root():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop is not available on Windows; httptools ships with uvicorn[standard] everywhere
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
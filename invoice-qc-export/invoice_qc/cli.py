@@ -1,7 +1,6 @@
 """
 CLI interface for invoice extraction and validation
 """
-import json
 import sys
 import os
 from pathlib import Path
@@ -10,10 +9,12 @@ import typer
 from rich.console import Console
 from rich.table import Table
 from rich import print as rprint
+import orjson
 
 from .extractor import InvoiceExtractor
 from .validator import InvoiceValidator
 from .models import Invoice
+from .utils import write_json, write_json_many
 
 app = typer.Typer(help="Invoice QC Service - Extract and validate invoices")
 console = Console()
@@ -35,26 +36,20 @@ def extract(
     
     console.print(f"[green]✓[/green] Extracted {len(invoices)} invoices")
     
-    # Convert to dict for JSON serialization
-    invoices_dict = [inv.model_dump() for inv in invoices]
-    
     if separate:
         # Save each invoice as separate file
         output_dir = Path(output).parent / "invoices_json"
         output_dir.mkdir(exist_ok=True)
         
-        for inv_dict in invoices_dict:
-            inv_id = inv_dict.get("invoice_number", "unknown")
-            filename = output_dir / f"{inv_id}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(inv_dict, f, indent=2, ensure_ascii=False)
+        filenames = [output_dir / f"{invoice.invoice_number}.json" for invoice in invoices]
+        write_json_many(zip(invoices, filenames))
+        for filename in filenames:
             console.print(f"[green]✓[/green] Saved: {filename}")
         
         console.print(f"[green]✓[/green] All invoices saved to: {output_dir}")
     else:
         # Save all to single file
-        with open(output, 'w', encoding='utf-8') as f:
-            json.dump(invoices_dict, f, indent=2, ensure_ascii=False)
+        write_json(invoices, output)
         console.print(f"[green]✓[/green] Saved to: {output}")
 
 
@@ -69,8 +64,7 @@ def validate(
     console.print(f"[bold blue]Validating invoices from:[/bold blue] {input}")
     
     # Load invoices
-    with open(input, 'r') as f:
-        invoices_data = json.load(f)
+    invoices_data = orjson.loads(Path(input).read_bytes())
     
     invoices = [Invoice(**inv) for inv in invoices_data]
     
@@ -82,8 +76,7 @@ def validate(
     _print_summary(validation_report)
     
     # Save report
-    with open(report, 'w') as f:
-        json.dump(validation_report.model_dump(), f, indent=2)
+    write_json(validation_report, report)
     
     console.print(f"\n[green]✓[/green] Report saved to: {report}")
     
@@ -115,9 +108,6 @@ def full_run(
     invoices = extractor.extract_from_directory(pdf_dir)
     console.print(f"[green]✓[/green] Extracted {len(invoices)} invoices\n")
     
-    # Convert to dict
-    invoices_dict = [inv.model_dump() for inv in invoices]
-    
     # Save extracted data
     if separate:
         # Save each invoice as separate JSON file
@@ -125,18 +115,15 @@ def full_run(
         invoices_dir.mkdir(exist_ok=True)
         
         console.print("[bold]Saving individual invoice files:[/bold]")
-        for inv_dict in invoices_dict:
-            inv_id = inv_dict.get("invoice_number", "unknown")
-            filename = invoices_dir / f"{inv_id}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(inv_dict, f, indent=2, ensure_ascii=False)
+        filenames = [invoices_dir / f"{invoice.invoice_number}.json" for invoice in invoices]
+        write_json_many(zip(invoices, filenames))
+        for filename in filenames:
             console.print(f"  [green]✓[/green] {filename}")
         console.print(f"[green]✓[/green] All invoices saved to: {invoices_dir}\n")
     
     # Always save combined file
     combined_file = output_path / "all_invoices.json"
-    with open(combined_file, 'w', encoding='utf-8') as f:
-        json.dump(invoices_dict, f, indent=2, ensure_ascii=False)
+    write_json(invoices, combined_file)
     console.print(f"[green]✓[/green] Combined data saved to: {combined_file}\n")
     
     # Step 2: Validate
@@ -149,8 +136,7 @@ def full_run(
     
     # Save validation report
     report_file = output_path / report if not Path(report).is_absolute() else Path(report)
-    with open(report_file, 'w', encoding='utf-8') as f:
-        json.dump(validation_report.model_dump(), f, indent=2, ensure_ascii=False)
+    write_json(validation_report, report_file)
     
     console.print(f"\n[green]✓[/green] Validation report saved to: {report_file}")
     
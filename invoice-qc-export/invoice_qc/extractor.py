@@ -2,99 +2,320 @@
 PDF extraction module - extracts structured data from invoice/order PDFs
 Supports German B2B documents (Bestellung/Rechnung)
 """
+import hashlib
+import multiprocessing
+import os
 import pdfplumber
+import pypdfium2 as pdfium
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Union
 from .models import Invoice, LineItem
 from .utils import parse_date, extract_amount
 
+try:
+    import hyperscan
+except ImportError:  # optional; the combined regex below is used instead
+    hyperscan = None
+
+# Directories with more PDFs than this are extracted in worker processes. A spawned worker takes
+# ~0.5s to start (it re-imports pdfplumber, pdfium, ...), against ~5ms to extract a PDF in-process
+PARALLEL_THRESHOLD = 200
+
+
+# Field patterns, compiled once and tried in priority order
+_ORDER_PATTERNS = [
+    re.compile(r"Bestellung\s+(AUFNR\d+)", re.IGNORECASE),
+    re.compile(r"(AUFNR\d+)", re.IGNORECASE),
+    re.compile(r"Rechnung\s*(?:Nr\.?|Number|#)?[:\s]*([A-Z0-9-]+)", re.IGNORECASE),
+    re.compile(r"Invoice\s*(?:No\.?|Number|#)?[:\s]*([A-Z0-9-]+)", re.IGNORECASE),
+]
+_DATE_PATTERNS = [
+    re.compile(r"vom\s+(\d{2}\.\d{2}\.\d{4})", re.IGNORECASE),
+    re.compile(r"Datum[:\s]*(\d{2}\.\d{2}\.\d{4})", re.IGNORECASE),
+    re.compile(r"Date[:\s]*(\d{2}[./-]\d{2}[./-]\d{4})", re.IGNORECASE),
+]
+_SELLER_NAME_PATTERNS = [
+    re.compile(r"^([A-Z][A-Za-z\s]+Corporation)", re.MULTILINE),
+    re.compile(r"^([A-Z][A-Za-z\s]+GmbH)", re.MULTILINE),
+    re.compile(r"Kundenanschrift\s*\n([^\n]+)", re.MULTILINE),
+]
+_SELLER_ADDRESS_RE = re.compile(r"Kundenanschrift\s*\n[^\n]+\n([^\n]+(?:GmbH|AG|Ltd)?)\s*\n([^\n]+)")
+_INDUSTRY_STREET_RE = re.compile(r"Industriestraße\s+\d+[^\n]*\n([^\n]+)")
+_POSTAL_CITY_RE = re.compile(r"(\d{5}\s+[A-Za-zäöüÄÖÜß]+)\s*\n?\s*Deutschland")
+_STREET_ADDRESS_RE = re.compile(r"([A-Za-zäöüÄÖÜß\-]+(?:str\.|straße|weg|platz)[^\n]*\d{5}[^\n]+)", re.IGNORECASE)
+_COUNTRY_POSTAL_RE = re.compile(r"([A-Z]{2}\s+\d{5})")
+_BUYER_NAME_PATTERNS = [
+    re.compile(r"Kundenanschrift\s*\n([^\n]+)"),
+    re.compile(r"im Auftrag von\s+\d+\s*\n([^\n]+)"),
+]
+_BUYER_ADDRESS_RE = re.compile(r"·\s*([^·\n]+,\s*[A-Za-zäöüÄÖÜß\s]+,\s*[A-Z]{2}\s+\d+)")
+_CUSTOMER_NUMBER_RE = re.compile(r"Kundennummer\s*\n(\d+)")
+_END_CUSTOMER_NUMBER_RE = re.compile(r"Endkundennummer\s*\n(\d+)")
+_NET_PATTERNS = [
+    re.compile(r"Gesamtwert\s+EUR\s+([\d.,]+)"),
+    re.compile(r"Netto[:\s]*([\d.,]+)"),
+    re.compile(r"Subtotal[:\s]*([\d.,]+)"),
+]
+_TAX_PATTERNS = [
+    re.compile(r"MwSt\.\s+[\d,]+%\s+EUR\s+([\d.,]+)"),
+    re.compile(r"VAT[:\s]*([\d.,]+)"),
+    re.compile(r"Tax[:\s]*([\d.,]+)"),
+]
+_GROSS_PATTERNS = [
+    re.compile(r"Gesamtwert\s+inkl\.\s+MwSt\.\s+EUR\s+([\d.,]+)"),
+    re.compile(r"Total\s+inkl[:\s]*([\d.,]+)"),
+    re.compile(r"Brutto[:\s]*([\d.,]+)"),
+]
+_PAYMENT_TERMS_RE = re.compile(r"Zahlungsbedingungen\s*\n([^\n]+)")
+_EXTERNAL_REFERENCE_RE = re.compile(r"im Auftrag von\s+(\d+)")
+# One line item per line: position, description, quantity "VE" ... line total at the end of the line.
+# [^\S\n] keeps every match on a single line of the full text
+_LINE_ITEM_RE = re.compile(
+    r"^(?P<pos>\d+)[^\S\n]+(?P<desc>.+?)[^\S\n]+(?P<qty>\d+)[^\S\n]+VE"
+    r"[^\n]*?(?P<total>[\d.,]+)[^\S\n]*$",
+    re.MULTILINE
+)
+
+# Primary (highest-priority) pattern of each single-valued field, combined into one
+# alternation so the text is walked once. Each alternative sits in a lookahead, so
+# matches never consume text and every field still sees its leftmost hit.
+_PRIMARY_FIELDS = [
+    ("order", _ORDER_PATTERNS[0]),
+    ("date", _DATE_PATTERNS[0]),
+    ("customer_number", _CUSTOMER_NUMBER_RE),
+    ("end_customer_number", _END_CUSTOMER_NUMBER_RE),
+    ("net", _NET_PATTERNS[0]),
+    ("tax", _TAX_PATTERNS[0]),
+    ("gross", _GROSS_PATTERNS[0]),
+    ("payment_terms", _PAYMENT_TERMS_RE),
+    ("external_reference", _EXTERNAL_REFERENCE_RE),
+]
+_PRIMARY_FIELDS_RE = re.compile("|".join(
+    f"(?=(?P<{name}>(?i:{pattern.pattern})))" if pattern.flags & re.IGNORECASE
+    else f"(?=(?P<{name}>{pattern.pattern}))"
+    for name, pattern in _PRIMARY_FIELDS
+))
+# The value is the pattern's own first group, numbered right after the named wrapper
+_PRIMARY_VALUE_GROUPS = {name: index + 1 for name, index in _PRIMARY_FIELDS_RE.groupindex.items()}
+
+
+def _compile_primary_database():
+    """
+    Compile the primary patterns into one Hyperscan database (a single automaton, no backtracking)
+    
+    Hyperscan only reports match offsets, so groups are recaptured with the Python pattern.
+    Returns None if hyperscan is not installed or rejects a pattern.
+    """
+    if hyperscan is None:
+        return None
+    flags = [
+        hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        | (hyperscan.HS_FLAG_CASELESS if pattern.flags & re.IGNORECASE else 0)
+        for _, pattern in _PRIMARY_FIELDS
+    ]
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            # Python's \s also matches the \x1c-\x1f separators, Unicode White_Space does not
+            expressions=[
+                pattern.pattern.replace(r"\s", r"(?:\s|[\x1c-\x1f])").encode()
+                for _, pattern in _PRIMARY_FIELDS
+            ],
+            ids=list(range(len(_PRIMARY_FIELDS))),
+            flags=flags
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+
+_PRIMARY_DATABASE = _compile_primary_database()
+# Hyperscan scratch space must not be shared between concurrent scans
+_scratch = threading.local()
+
 
 class InvoiceExtractor:
     """Extract structured invoice data from PDFs"""
     
+    def __init__(self, text_cache_dir: Optional[Union[str, Path]] = None,
+                 text_cache_max_age: Optional[float] = None):
+        """
+        If text_cache_dir is given, the text of each PDF is cached there keyed by the SHA-1
+        of the file contents, so re-extracting the same document skips PDF parsing.
+        With text_cache_max_age (seconds), extract_from_directory first deletes older entries.
+        """
+        self.text_cache_dir = Path(text_cache_dir) if text_cache_dir is not None else None
+        self.text_cache_max_age = text_cache_max_age
+    
     def extract_from_pdf(self, pdf_path: str) -> Invoice:
         """Extract invoice data from a single PDF"""
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                full_text += page.extract_text() + "\n"
-            
-            # Extract fields based on German document format
-            invoice_data = {
-                "invoice_number": self._extract_order_number(full_text),
-                "invoice_date": self._extract_date(full_text),
-                "due_date": None,  # Not in these documents
-                "seller_name": self._extract_seller_name(full_text),
-                "seller_address": self._extract_seller_address(full_text),
-                "seller_tax_id": self._extract_customer_number(full_text),
-                "buyer_name": self._extract_buyer_name(full_text),
-                "buyer_address": self._extract_buyer_address(full_text),
-                "buyer_tax_id": self._extract_end_customer_number(full_text),
-                "currency": "EUR",
-                "net_total": self._extract_net_total(full_text),
-                "tax_amount": self._extract_tax_amount(full_text),
-                "gross_total": self._extract_gross_total(full_text),
-                "payment_terms": self._extract_payment_terms(full_text),
-                "external_reference": self._extract_external_reference(full_text),
-            }
-            
-            # Extract line items
-            line_items = self._extract_line_items(full_text)
-            invoice_data["line_items"] = line_items
-            
-            return Invoice(**invoice_data)
+        full_text = self._read_text(pdf_path)
+        
+        # Single pass over the text for the primary pattern of each field
+        hits = _scan_primary_fields(full_text)
+        
+        # Extract fields based on German document format
+        invoice_data = {
+            "invoice_number": self._from_scan(hits, "order", str.strip, self._extract_order_number, full_text),
+            "invoice_date": self._from_scan(hits, "date", parse_date, self._extract_date, full_text),
+            "due_date": None,  # Not in these documents
+            "seller_name": self._extract_seller_name(full_text),
+            "seller_address": self._extract_seller_address(full_text),
+            "seller_tax_id": self._from_scan(hits, "customer_number", str.strip, self._extract_customer_number, full_text),
+            "buyer_name": self._extract_buyer_name(full_text),
+            "buyer_address": self._extract_buyer_address(full_text),
+            "buyer_tax_id": self._from_scan(hits, "end_customer_number", str.strip, self._extract_end_customer_number, full_text),
+            "currency": "EUR",
+            "net_total": self._from_scan(hits, "net", extract_amount, self._extract_net_total, full_text),
+            "tax_amount": self._from_scan(hits, "tax", extract_amount, self._extract_tax_amount, full_text),
+            "gross_total": self._from_scan(hits, "gross", extract_amount, self._extract_gross_total, full_text),
+            "payment_terms": self._from_scan(hits, "payment_terms", str.strip, self._extract_payment_terms, full_text),
+            "external_reference": self._from_scan(hits, "external_reference", str.strip, self._extract_external_reference, full_text),
+        }
+        
+        # Extract line items
+        line_items = self._extract_line_items(full_text)
+        invoice_data["line_items"] = line_items
+        
+        return Invoice(**invoice_data)
+    
+    def _read_text(self, pdf_path: str) -> str:
+        """Read the text of the PDF, from the text cache when possible"""
+        if self.text_cache_dir is None:
+            return self._parse_text(pdf_path)
+        
+        with open(pdf_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        cache_file = self.text_cache_dir / f"{digest}.txt"
+        try:
+            return cache_file.read_bytes().decode("utf-8", "surrogatepass")
+        except FileNotFoundError:
+            pass
+        
+        text = self._parse_text(pdf_path)
+        try:
+            self._store_text(cache_file, text)
+        except OSError:
+            # The cache is only an optimization; a read-only or full disk must not fail extraction
+            pass
+        return text
+    
+    def _store_text(self, cache_file: Path, text: str) -> None:
+        """Write a text cache entry via a temporary file, so concurrent workers never see a partial entry"""
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(text.encode("utf-8", "surrogatepass"))
+            os.replace(tmp_name, cache_file)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    
+    def _prune_text_cache(self) -> None:
+        """Delete text cache entries (and leftover temporary files) older than text_cache_max_age"""
+        cutoff = time.time() - self.text_cache_max_age
+        try:
+            entries = os.scandir(self.text_cache_dir)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith((".txt", ".tmp")) and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    # Already removed by a concurrent prune
+                    pass
+    
+    def _parse_text(self, pdf_path: str) -> str:
+        """Read the text of every page with pdfium, falling back to pdfplumber where its text is unusable"""
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            pages = [page.get_textpage().get_text_range().replace("\r\n", "\n") for page in pdf]
+        finally:
+            pdf.close()
+        
+        # pdfium returns text in content-stream order, not visual layout, so e.g. a table drawn
+        # column by column comes out scrambled. Without line items and a total, re-read the whole
+        # document with pdfplumber, which orders text by position
+        if not _has_items_and_totals("\n".join(pages)):
+            with pdfplumber.open(pdf_path) as plumber_pdf:
+                return "".join((page.extract_text() or "") + "\n" for page in plumber_pdf.pages)
+        
+        # pdfium finds no text on some pages (e.g. unusual font encodings), so retry those with pdfplumber
+        empty_pages = [index for index, text in enumerate(pages) if not text.strip()]
+        if empty_pages:
+            with pdfplumber.open(pdf_path) as plumber_pdf:
+                for index in empty_pages:
+                    # extract_text() gives None for image-only pages on some pdfplumber versions
+                    pages[index] = plumber_pdf.pages[index].extract_text() or ""
+        
+        return "\n".join(pages) + "\n"
     
-    def extract_from_directory(self, pdf_dir: str) -> List[Invoice]:
-        """Extract invoices from all PDFs in a directory"""
-        pdf_path = Path(pdf_dir)
-        invoices = []
+    def extract_from_directory(self, pdf_dir: str, max_workers: Optional[int] = None) -> List[Invoice]:
+        """
+        Extract invoices from all PDFs in a directory, using a process pool for large directories
         
-        for pdf_file in sorted(pdf_path.glob("*.pdf")):
-            try:
-                invoice = self.extract_from_pdf(str(pdf_file))
-                invoices.append(invoice)
-            except Exception as e:
-                print(f"Error processing {pdf_file}: {e}")
+        Directories of more than PARALLEL_THRESHOLD PDFs are extracted in spawned worker processes,
+        which re-import the calling script: a script calling this at module level needs an
+        if __name__ == "__main__": guard. max_workers=1 keeps the work in-process.
+        """
+        # One scandir pass, no Path objects; the extension check is case-insensitive so .PDF files are included
+        with os.scandir(pdf_dir) as entries:
+            pdf_entries = [entry for entry in entries if entry.name.lower().endswith(".pdf") and entry.is_file()]
+        pdf_entries.sort(key=lambda entry: entry.name)
+        pdf_files = [entry.path for entry in pdf_entries]
+        if not pdf_files:
+            return []
         
-        return invoices
+        if self.text_cache_dir is not None and self.text_cache_max_age is not None:
+            self._prune_text_cache()
+        
+        workers = min(len(pdf_files), max_workers or os.cpu_count() or 1)
+        if len(pdf_files) <= PARALLEL_THRESHOLD or workers < 2:
+            results = [_extract_one(self, pdf_file) for pdf_file in pdf_files]
+        else:
+            # Each PDF is independent, so spread them across cores; map keeps input order.
+            # Workers are spawned, not forked: callers (the API runs this via to_thread) have other threads alive
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = list(executor.map(partial(_extract_one, self), pdf_files))
+        
+        return [invoice for invoice in results if invoice is not None]
+    
+    def _from_scan(self, hits: Dict[str, str], name: str, convert: Callable,
+                   fallback: Callable[[str], object], text: str):
+        """Use the single-pass hit for a field, falling back to its full pattern list"""
+        if name in hits:
+            return convert(hits[name])
+        return fallback(text)
     
     def _extract_order_number(self, text: str) -> Optional[str]:
         """Extract order/invoice number (AUFNR...)"""
-        patterns = [
-            r"Bestellung\s+(AUFNR\d+)",
-            r"(AUFNR\d+)",
-            r"Rechnung\s*(?:Nr\.?|Number|#)?[:\s]*([A-Z0-9-]+)",
-            r"Invoice\s*(?:No\.?|Number|#)?[:\s]*([A-Z0-9-]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _ORDER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         return None
     
     def _extract_date(self, text: str) -> Optional[str]:
         """Extract document date"""
-        patterns = [
-            r"vom\s+(\d{2}\.\d{2}\.\d{4})",
-            r"Datum[:\s]*(\d{2}\.\d{2}\.\d{4})",
-            r"Date[:\s]*(\d{2}[./-]\d{2}[./-]\d{4})",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return parse_date(match.group(1))
         return None
     
     def _extract_seller_name(self, text: str) -> Optional[str]:
         """Extract seller/supplier name (first company in header)"""
-        patterns = [
-            r"^([A-Z][A-Za-z\s]+Corporation)",
-            r"^([A-Z][A-Za-z\s]+GmbH)",
-            r"Kundenanschrift\s*\n([^\n]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE)
+        for pattern in _SELLER_NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
@@ -108,27 +329,27 @@ class InvoiceExtractor:
     def _extract_seller_address(self, text: str) -> Optional[str]:
         """Extract seller address"""
         # Look for address after Kundenanschrift
-        match = re.search(r"Kundenanschrift\s*\n[^\n]+\n([^\n]+(?:GmbH|AG|Ltd)?)\s*\n([^\n]+)", text)
+        match = _SELLER_ADDRESS_RE.search(text)
         if match:
             return f"{match.group(1).strip()}, {match.group(2).strip()}"
         
         # Look for Industriestraße pattern
-        match = re.search(r"Industriestraße\s+\d+[^\n]*\n([^\n]+)", text)
+        match = _INDUSTRY_STREET_RE.search(text)
         if match:
             return f"Industriestraße, {match.group(1).strip()}"
         
         # Look for postal code + city + Deutschland
-        match = re.search(r"(\d{5}\s+[A-Za-zäöüÄÖÜß]+)\s*\n?\s*Deutschland", text)
+        match = _POSTAL_CITY_RE.search(text)
         if match:
             return match.group(1).strip()
         
         # Look for any address with postal code
-        match = re.search(r"([A-Za-zäöüÄÖÜß\-]+(?:str\.|straße|weg|platz)[^\n]*\d{5}[^\n]+)", text, re.IGNORECASE)
+        match = _STREET_ADDRESS_RE.search(text)
         if match:
             return match.group(1).strip()
         
         # Fallback: look for city with postal code
-        match = re.search(r"([A-Z]{2}\s+\d{5})", text)
+        match = _COUNTRY_POSTAL_RE.search(text)
         if match:
             return match.group(1).strip()
         
@@ -136,12 +357,8 @@ class InvoiceExtractor:
     
     def _extract_buyer_name(self, text: str) -> Optional[str]:
         """Extract buyer name"""
-        patterns = [
-            r"Kundenanschrift\s*\n([^\n]+)",
-            r"im Auftrag von\s+\d+\s*\n([^\n]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _BUYER_NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 name = match.group(1).strip()
                 if name and len(name) > 3:
@@ -150,74 +367,59 @@ class InvoiceExtractor:
     
     def _extract_buyer_address(self, text: str) -> Optional[str]:
         """Extract buyer address"""
-        match = re.search(r"·\s*([^·\n]+,\s*[A-Za-zäöüÄÖÜß\s]+,\s*[A-Z]{2}\s+\d+)", text)
+        match = _BUYER_ADDRESS_RE.search(text)
         if match:
             return match.group(1).strip()
         return None
     
     def _extract_customer_number(self, text: str) -> Optional[str]:
         """Extract customer number"""
-        match = re.search(r"Kundennummer\s*\n(\d+)", text)
+        match = _CUSTOMER_NUMBER_RE.search(text)
         if match:
             return match.group(1).strip()
         return None
     
     def _extract_end_customer_number(self, text: str) -> Optional[str]:
         """Extract end customer number"""
-        match = re.search(r"Endkundennummer\s*\n(\d+)", text)
+        match = _END_CUSTOMER_NUMBER_RE.search(text)
         if match:
             return match.group(1).strip()
         return None
     
     def _extract_net_total(self, text: str) -> Optional[float]:
         """Extract net total (before tax)"""
-        patterns = [
-            r"Gesamtwert\s+EUR\s+([\d.,]+)",
-            r"Netto[:\s]*([\d.,]+)",
-            r"Subtotal[:\s]*([\d.,]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _NET_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return extract_amount(match.group(1))
         return None
     
     def _extract_tax_amount(self, text: str) -> Optional[float]:
         """Extract tax amount (MwSt)"""
-        patterns = [
-            r"MwSt\.\s+[\d,]+%\s+EUR\s+([\d.,]+)",
-            r"VAT[:\s]*([\d.,]+)",
-            r"Tax[:\s]*([\d.,]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _TAX_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return extract_amount(match.group(1))
         return None
     
     def _extract_gross_total(self, text: str) -> Optional[float]:
         """Extract gross total (including tax)"""
-        patterns = [
-            r"Gesamtwert\s+inkl\.\s+MwSt\.\s+EUR\s+([\d.,]+)",
-            r"Total\s+inkl[:\s]*([\d.,]+)",
-            r"Brutto[:\s]*([\d.,]+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _GROSS_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return extract_amount(match.group(1))
         return None
     
     def _extract_payment_terms(self, text: str) -> Optional[str]:
         """Extract payment terms"""
-        match = re.search(r"Zahlungsbedingungen\s*\n([^\n]+)", text)
+        match = _PAYMENT_TERMS_RE.search(text)
         if match:
             return match.group(1).strip()
         return None
     
     def _extract_external_reference(self, text: str) -> Optional[str]:
         """Extract external reference (Auftrag number)"""
-        match = re.search(r"im Auftrag von\s+(\d+)", text)
+        match = _EXTERNAL_REFERENCE_RE.search(text)
         if match:
             return match.group(1).strip()
         return None
@@ -226,32 +428,78 @@ class InvoiceExtractor:
         """Extract line items from the document"""
         items = []
         
-        # Pattern for line items: Pos number, description, quantity, unit, price
-        pattern = r"(\d+)\s+([A-Za-zäöüÄÖÜß\s\-\'\"]+?)\s+(\d+)\s+VE\s+.*?([\d.,]+)\s*$"
-        
-        lines = text.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            # Look for position number at start
-            pos_match = re.match(r"^(\d+)\s+(.+?)\s+(\d+)\s+VE", line)
-            if pos_match:
-                pos = pos_match.group(1)
-                desc = pos_match.group(2).strip()
-                qty = int(pos_match.group(3))
-                
-                # Find the price at end of line
-                price_match = re.search(r"([\d.,]+)\s*$", line)
-                if price_match:
-                    total = extract_amount(price_match.group(1))
-                    if total and qty > 0:
-                        unit_price = total / qty
-                        items.append(LineItem(
-                            description=desc,
-                            quantity=float(qty),
-                            unit_price=unit_price,
-                            line_total=total
-                        ))
-            i += 1
+        for match in _LINE_ITEM_RE.finditer(text):
+            qty = int(match["qty"])
+            total = extract_amount(match["total"])
+            if total and qty > 0:
+                unit_price = total / qty
+                items.append(LineItem(
+                    description=match["desc"].strip(),
+                    quantity=float(qty),
+                    unit_price=unit_price,
+                    line_total=total
+                ))
         
         return items
+
+
+def _has_items_and_totals(text: str) -> bool:
+    """Whether the text holds at least one line item and a net or gross total"""
+    return _LINE_ITEM_RE.search(text) is not None and any(
+        pattern.search(text) for pattern in (*_NET_PATTERNS, *_GROSS_PATTERNS)
+    )
+
+
+def _scan_primary_fields(text: str) -> Dict[str, str]:
+    """Collect the first primary-pattern value of each field in one scan of the text"""
+    if _PRIMARY_DATABASE is not None:
+        try:
+            return _scan_primary_fields_hyperscan(text, text.encode("utf-8"))
+        except UnicodeEncodeError:
+            # Lone surrogates from broken PDF text cannot become the valid UTF-8 Hyperscan expects
+            pass
+    
+    hits = {}
+    for match in _PRIMARY_FIELDS_RE.finditer(text):
+        name = match.lastgroup
+        if name not in hits:
+            hits[name] = match.group(_PRIMARY_VALUE_GROUPS[name])
+            if len(hits) == len(_PRIMARY_VALUE_GROUPS):
+                break
+    return hits
+
+
+def _scan_primary_fields_hyperscan(text: str, data: bytes) -> Dict[str, str]:
+    """Hyperscan variant of _scan_primary_fields; data is the UTF-8 encoded text"""
+    scratch = getattr(_scratch, "scratch", None)
+    if scratch is None:
+        scratch = _scratch.scratch = hyperscan.Scratch(_PRIMARY_DATABASE)
+    
+    # Matches are reported by end offset, so keep the smallest start seen for each pattern
+    starts = {}
+    
+    def on_match(pattern_id, start, end, flags, context):
+        if start < starts.get(pattern_id, start + 1):
+            starts[pattern_id] = start
+    
+    _PRIMARY_DATABASE.scan(data, match_event_handler=on_match, scratch=scratch)
+    
+    hits = {}
+    is_ascii = text.isascii()
+    for pattern_id, start in starts.items():
+        name, pattern = _PRIMARY_FIELDS[pattern_id]
+        # Offsets are in UTF-8 bytes; convert to a str index unless they coincide
+        position = start if is_ascii else len(data[:start].decode("utf-8"))
+        match = pattern.match(text, position)
+        if match:
+            hits[name] = match.group(1)
+    return hits
+
+
+def _extract_one(extractor: InvoiceExtractor, pdf_path: str) -> Optional[Invoice]:
+    """Extract a single PDF, returning None on failure"""
+    try:
+        return extractor.extract_from_pdf(pdf_path)
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+        return None
@@ -1,8 +1,10 @@
 """
 Pydantic models for invoice data structures
 """
+import sys
+from dataclasses import dataclass
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import date
 
 
@@ -43,9 +45,18 @@ class Invoice(BaseModel):
     
     # Line items
     line_items: List[LineItem] = Field(default_factory=list)
+    
+    @field_validator("currency")
+    @classmethod
+    def _intern_currency(cls, value: Optional[str]) -> Optional[str]:
+        """Share one string object per currency code across all invoices"""
+        return sys.intern(value) if value is not None else None
 
 
-class ValidationError(BaseModel):
+# A plain slotted dataclass: the validator creates one per failed rule, and its fields are
+# always plain strings, so Pydantic's per-instance validation would only add cost
+@dataclass(frozen=True, slots=True)
+class ValidationError:
     """Single validation error"""
     rule: str
     message: str
@@ -1,267 +1,698 @@
 """
 Validation module - validates invoices against business rules
 """
-from typing import List, Dict, Tuple
+import hashlib
+import math
+import multiprocessing
+import os
+import pickle
+import re
+import string
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
+from itertools import islice, repeat
+from operator import attrgetter, is_not
+import numpy as np
 from .models import (
-    Invoice, ValidationError, InvoiceValidationResult,
+    Invoice, LineItem, ValidationError, InvoiceValidationResult,
     ValidationSummary, ValidationReport
 )
-from .utils import is_valid_currency, calculate_tolerance_match
+from .utils import is_valid_currency
+from . import _kernels
+
+try:
+    import xxhash
+except ImportError:  # optional; blake2b is used instead
+    xxhash = None
+
+# Rule identifiers reported in ValidationError.rule
+RULE_REQUIRED_FIELD = "required_field"
+RULE_PARTY_INFORMATION = "party_information"
+RULE_FINANCIAL_FIELD = "financial_field"
+RULE_CURRENCY_REQUIRED = "currency_required"
+RULE_DATE_FORMAT = "date_format"
+RULE_CURRENCY_VALIDATION = "currency_validation"
+RULE_NUMERIC_VALIDATION = "numeric_validation"
+RULE_LINE_ITEMS_SUM = "line_items_sum"
+RULE_TAX_CALCULATION = "tax_calculation"
+RULE_DUE_DATE_LOGIC = "due_date_logic"
+RULE_DUPLICATE_INVOICE = "duplicate_invoice"
+RULE_REASONABLE_AMOUNT = "reasonable_amount"
+
+# Batches larger than this are validated column-wise with NumPy
+VECTORIZE_THRESHOLD = 32
+
+# Batches larger than this are split across worker processes, at least SHARD_SIZE invoices each.
+# A spawned pool costs ~0.6s per worker plus pickling, against ~25us per invoice in-process
+# (20k invoices: 0.6s in-process vs 3.4s pooled), so it only pays off around 100k invoices
+PARALLEL_THRESHOLD = 100_000
+SHARD_SIZE = 500
+
+# validate_stream validates this many invoices at a time
+STREAM_CHUNK_SIZE = 1024
+
+# With cache_results, rule results for this many distinct invoice payloads are kept per validator
+# (least recently used evicted)
+RESULT_CACHE_SIZE = 16384
+
+
+def _hash64(data: bytes) -> int:
+    """64-bit hash of data: xxh3 when available, otherwise blake2b"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _invoice_key_hash(invoice_key: Tuple[Optional[str], Optional[str], Optional[str]]) -> int:
+    """
+    64-bit hash of the duplicate-detection key (invoice number, seller, date)
+    
+    The key is encoded by its repr, which quotes and escapes each string and spells out None,
+    so distinct keys never encode to the same bytes (and lone surrogates come out escaped);
+    a 64-bit collision is negligible at any realistic batch size.
+    """
+    return _hash64(repr(invoice_key).encode())
+
+
+def _result_key(invoice: Invoice) -> int:
+    """
+    64-bit hash of every field the rules (other than duplicate detection) read
+    
+    Pickled rather than JSON-dumped: floats keep their exact bits, so NaN, inf and -0.0 don't
+    collide with missing or zero amounts. Fields no rule looks at (descriptions, payment terms,
+    references) are left out, so re-submissions that only differ there still share a result.
+    """
+    fields = (
+        invoice.invoice_number, invoice.invoice_date, invoice.due_date,
+        invoice.seller_name, invoice.seller_address, invoice.seller_tax_id,
+        invoice.buyer_name, invoice.buyer_address, invoice.buyer_tax_id,
+        invoice.currency, invoice.net_total, invoice.tax_amount, invoice.gross_total,
+        tuple(item.line_total for item in invoice.line_items),
+    )
+    return _hash64(pickle.dumps(fields, pickle.HIGHEST_PROTOCOL))
+
+
+def _line_items_sum(line_items: List[LineItem]) -> float:
+    """Correctly rounded sum of the line totals (math.fsum), falling back to sum() for inf - inf or overflow"""
+    totals = [item.line_total for item in line_items]
+    try:
+        return math.fsum(totals)
+    except (ValueError, OverflowError):
+        return sum(totals)
+
+
+# Invoice and due dates repeat heavily within a batch, so each distinct string is parsed once
+@lru_cache(maxsize=8192)
+def _parse_iso(date_str: str) -> Optional[datetime]:
+    """datetime.fromisoformat, or None if the string is not a valid ISO date"""
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        return None
+
+
+# Every form datetime.fromisoformat accepts starts like this (YYYY-MM, YYYYMMDD, YYYY-Www, YYYYWww),
+# so anything else is rejected without a parse attempt
+_ISO_DATE_START = re.compile(r"[0-9]{4}[-W0-9]").match
+
+
+def _parse_date(value) -> Optional[datetime]:
+    """_parse_iso for any value: non-strings and strings that can't be ISO dates are None without raising"""
+    if not isinstance(value, str) or _ISO_DATE_START(value) is None:
+        return None
+    return _parse_iso(value)
+
+# Plain ISO dates (YYYY-MM-DD), the shape nearly every invoice uses
+_PLAIN_ISO_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _plain_iso_dates(values: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Check and convert plain YYYY-MM-DD strings in bulk, without per-value parsing or exceptions
+    
+    Returns (plain, valid, days): which values have the plain shape, which of those are real
+    calendar dates (as datetime.fromisoformat would accept), and their datetime64[D] values.
+    """
+    n = len(values)
+    plain = np.fromiter(
+        (bool(value) and _PLAIN_ISO_DATE_RE.fullmatch(value) is not None for value in values), dtype=bool, count=n
+    )
+    valid = np.zeros(n, dtype=bool)
+    days = np.zeros(n, dtype="datetime64[D]")
+    
+    index = np.flatnonzero(plain)
+    if len(index):
+        text = "".join([values[i] for i in index.tolist()]).encode("ascii")
+        digits = (np.frombuffer(text, dtype=np.uint8).reshape(-1, 10) - ord("0")).astype(np.int64)
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 5] * 10 + digits[:, 6]
+        day = digits[:, 8] * 10 + digits[:, 9]
+        
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_length = _DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap & (month == 2))
+        valid[index] = (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_length)
+        days[index] = (
+            (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (month - 1)
+        ).astype("datetime64[D]") + (day - 1)
+    
+    return plain, valid, days
+
+
+# Errors whose message never varies: ValidationError is frozen, so one instance is shared by all invoices
+_E_MISSING_INVOICE_NUMBER = ValidationError(rule=RULE_REQUIRED_FIELD, message="Missing required field: invoice_number")
+_E_MISSING_INVOICE_DATE = ValidationError(rule=RULE_REQUIRED_FIELD, message="Missing required field: invoice_date")
+_E_MISSING_SELLER_NAME = ValidationError(rule=RULE_REQUIRED_FIELD, message="Missing required field: seller_name")
+_E_MISSING_BUYER_NAME = ValidationError(rule=RULE_REQUIRED_FIELD, message="Missing required field: buyer_name")
+_E_SELLER_PARTY = ValidationError(rule=RULE_PARTY_INFORMATION, message="Seller must have address or tax ID")
+_E_BUYER_PARTY = ValidationError(rule=RULE_PARTY_INFORMATION, message="Buyer must have address or tax ID")
+_E_MISSING_NET = ValidationError(rule=RULE_FINANCIAL_FIELD, message="Missing net_total")
+_E_MISSING_TAX = ValidationError(rule=RULE_FINANCIAL_FIELD, message="Missing tax_amount")
+_E_MISSING_GROSS = ValidationError(rule=RULE_FINANCIAL_FIELD, message="Missing gross_total")
+_E_MISSING_CURRENCY = ValidationError(rule=RULE_CURRENCY_REQUIRED, message="Currency must be specified")
+_E_NEGATIVE_NET = ValidationError(rule=RULE_NUMERIC_VALIDATION, message="net_total cannot be negative")
+_E_NEGATIVE_TAX = ValidationError(rule=RULE_NUMERIC_VALIDATION, message="tax_amount cannot be negative")
+_E_NEGATIVE_GROSS = ValidationError(rule=RULE_NUMERIC_VALIDATION, message="gross_total cannot be negative")
+_E_GROSS_NOT_POSITIVE = ValidationError(rule=RULE_REASONABLE_AMOUNT, message="gross_total must be greater than 0")
+
+# Source of the per-invoice rule function, see _compile_rules. $net_limit, $gross_limit and
+# $max_amount_check are filled in from the validator settings.
+_RULES_TEMPLATE = string.Template('''
+def validate_rules(invoice):
+    invoice_number = invoice.invoice_number
+    invoice_date = invoice.invoice_date
+    due_date = invoice.due_date
+    seller_name = invoice.seller_name
+    buyer_name = invoice.buyer_name
+    currency = invoice.currency
+    net = invoice.net_total
+    tax = invoice.tax_amount
+    gross = invoice.gross_total
+    line_items = invoice.line_items
+    
+    errors = []
+    append = errors.append
+    
+    # Rule 1: Required fields
+    if not invoice_number or (isinstance(invoice_number, str) and not invoice_number.strip()):
+        append(_E_MISSING_INVOICE_NUMBER)
+    if not invoice_date or (isinstance(invoice_date, str) and not invoice_date.strip()):
+        append(_E_MISSING_INVOICE_DATE)
+    if not seller_name or (isinstance(seller_name, str) and not seller_name.strip()):
+        append(_E_MISSING_SELLER_NAME)
+    if not buyer_name or (isinstance(buyer_name, str) and not buyer_name.strip()):
+        append(_E_MISSING_BUYER_NAME)
+    
+    # Rule 2: Party information
+    if seller_name and not invoice.seller_address and not invoice.seller_tax_id:
+        append(_E_SELLER_PARTY)
+    if buyer_name and not invoice.buyer_address and not invoice.buyer_tax_id:
+        append(_E_BUYER_PARTY)
+    
+    # Rule 3: Financial fields
+    if net is None:
+        append(_E_MISSING_NET)
+    if tax is None:
+        append(_E_MISSING_TAX)
+    if gross is None:
+        append(_E_MISSING_GROSS)
+    
+    # Rule 4: Currency specification
+    if not currency or not currency.strip():
+        append(_E_MISSING_CURRENCY)
+    
+    # Rule 5: Date format (the parsed dates are reused by rule 10)
+    invoice_day = _parse_date(invoice_date) if invoice_date else None
+    due_day = _parse_date(due_date) if due_date else None
+    if invoice_date and invoice_day is None:
+        append(ValidationError(rule=RULE_DATE_FORMAT, message=f"Invalid invoice_date format: {invoice_date}"))
+    if due_date and due_day is None:
+        append(ValidationError(rule=RULE_DATE_FORMAT, message=f"Invalid due_date format: {due_date}"))
+    
+    # Rule 6: Currency validation
+    if currency and not is_valid_currency(currency):
+        append(ValidationError(rule=RULE_CURRENCY_VALIDATION, message=f"Unknown currency: {currency}"))
+    
+    # Rule 7: Numeric values
+    if net is not None and net < 0:
+        append(_E_NEGATIVE_NET)
+    if tax is not None and tax < 0:
+        append(_E_NEGATIVE_TAX)
+    if gross is not None and gross < 0:
+        append(_E_NEGATIVE_GROSS)
+    
+    # Rule 8: Line items sum ("< inf" rejects NaN and infinite differences, as calculate_tolerance_match does)
+    if line_items and net is not None:
+        line_items_sum = _line_items_sum(line_items)
+        difference = abs(line_items_sum - net)
+        if not (difference < inf and difference <= $net_limit):
+            append(ValidationError(
+                rule=RULE_LINE_ITEMS_SUM,
+                message=f"Line items sum ({line_items_sum:.2f}) doesn't match net_total ({net:.2f})"
+            ))
+    
+    # Rule 9: Tax calculation
+    if net is not None and tax is not None and gross is not None:
+        expected_gross = net + tax
+        difference = abs(expected_gross - gross)
+        if not (difference < inf and difference <= $gross_limit):
+            append(ValidationError(
+                rule=RULE_TAX_CALCULATION,
+                message=f"net_total + tax_amount ({expected_gross:.2f}) doesn't match gross_total ({gross:.2f})"
+            ))
+    
+    # Rule 10: Due date logic
+    if invoice_day is not None and due_day is not None and due_day < invoice_day:
+        append(ValidationError(
+            rule=RULE_DUE_DATE_LOGIC,
+            message=f"due_date ({due_date}) is before invoice_date ({invoice_date})"
+        ))
+    
+    # Rule 11 (duplicates) is applied per invoice in _make_result
+    
+    # Rule 12: Reasonable amounts
+    if gross is not None:
+        if gross <= 0:
+            append(_E_GROSS_NOT_POSITIVE)
+$max_amount_check
+    return tuple(errors)
+''')
+
+_MAX_AMOUNT_CHECK = '''        elif gross > MAX_AMOUNT:
+            append(ValidationError(
+                rule=RULE_REASONABLE_AMOUNT,
+                message=f"gross_total ({gross:.2f}) exceeds maximum ({MAX_AMOUNT_TEXT})"
+            ))
+'''
+
+
+def _compile_rules(tolerance: float, max_amount: float, rel_tolerance: float) -> Callable[[Invoice], Tuple[ValidationError, ...]]:
+    """
+    Build the per-invoice rule function for one set of validator settings
+    
+    The settings become constants of the generated code, and checks they make vacuous are left
+    out: the relative term when rel_tolerance is 0, the maximum when max_amount is infinite.
+    Each invoice field is read once into a local, and rules run in the order errors are reported.
+    """
+    source = _RULES_TEMPLATE.substitute(
+        net_limit="TOLERANCE + REL_TOLERANCE * abs(net)" if rel_tolerance else "TOLERANCE",
+        gross_limit="TOLERANCE + REL_TOLERANCE * abs(gross)" if rel_tolerance else "TOLERANCE",
+        max_amount_check="" if max_amount == math.inf else _MAX_AMOUNT_CHECK,
+    )
+    namespace = dict(
+        globals(),
+        inf=math.inf,
+        TOLERANCE=tolerance,
+        REL_TOLERANCE=rel_tolerance,
+        MAX_AMOUNT=max_amount,
+        MAX_AMOUNT_TEXT=f"{max_amount:.2f}",
+    )
+    exec(compile(source, "<invoice rules>", "exec"), namespace)
+    return namespace["validate_rules"]
+
+
+class _RunningSummary:
+    """Summary counts accumulated as results come in"""
+    
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        # Counted by (rule, message); the "rule: message" keys are only built once per distinct pair
+        self.error_counts = Counter()
+        self.warning_counts = Counter()
+    
+    def update(self, results: List[InvoiceValidationResult]):
+        """Add a list of results to the counts"""
+        self.total += len(results)
+        self.valid += sum(r.is_valid for r in results)
+        self.error_counts.update((e.rule, e.message) for r in results for e in r.errors)
+        self.warning_counts.update((w.rule, w.message) for r in results for w in r.warnings)
+    
+    def finalize(self) -> ValidationSummary:
+        """Summary of every result added so far"""
+        return ValidationSummary(
+            total_invoices=self.total,
+            valid_invoices=self.valid,
+            invalid_invoices=self.total - self.valid,
+            error_counts={f"{rule}: {message}": count for (rule, message), count in self.error_counts.items()},
+            warning_counts={f"{rule}: {message}": count for (rule, message), count in self.warning_counts.items()}
+        )
 
 
 class InvoiceValidator:
     """Validate invoices against schema and business rules"""
     
-    def __init__(self, tolerance: float = 0.02, max_amount: float = 1000000):
+    def __init__(self, tolerance: float = 0.02, max_amount: float = 1000000, rel_tolerance: float = 0.0,
+                 fail_fast_on_duplicate: bool = False, cache_results: bool = False):
         self.tolerance = tolerance
         self.max_amount = max_amount
-        self.seen_invoices = set()
+        # Extra allowance per unit of amount, for totals too large for the absolute tolerance alone
+        self.rel_tolerance = rel_tolerance
+        # Report a duplicate with only the duplicate_invoice error, skipping the other rules
+        self.fail_fast_on_duplicate = fail_fast_on_duplicate
+        # Reuse rule results for repeated payloads. Off by default: hashing a payload costs nearly as
+        # much as the rules, so it only pays off for a long-lived validator that sees re-submissions
+        self.cache_results = cache_results
+        # Summary of the last validate_stream run, set once its iterator is exhausted
+        self.stream_summary: Optional[ValidationSummary] = None
+        # Every rule except duplicate detection, specialized for these settings (see _compile_rules)
+        self._validate_rules = _compile_rules(tolerance, max_amount, rel_tolerance)
+        # 64-bit hashes of the keys seen so far, see _invoice_key_hash
+        self._seen_hashes = set()
+        # Rule errors without the duplicate check, by _result_key, least recently used first (cache_results)
+        self._result_cache = OrderedDict()
     
-    def validate_invoices(self, invoices: List[Invoice]) -> ValidationReport:
-        """Validate a list of invoices and return report"""
-        results = []
-        
-        for invoice in invoices:
-            result = self.validate_invoice(invoice)
-            results.append(result)
+    def validate_invoices(self, invoices: List[Invoice], max_workers: Optional[int] = None) -> ValidationReport:
+        """
+        Validate a list of invoices and return report
+        
+        Batches of more than PARALLEL_THRESHOLD invoices are validated in spawned worker processes,
+        which re-import the calling script: a script calling this at module level needs an
+        if __name__ == "__main__": guard. max_workers=1 keeps the work in-process.
+        """
+        if len(invoices) > VECTORIZE_THRESHOLD:
+            results = self._validate_many(invoices, max_workers)
+        else:
+            results = [self.validate_invoice(invoice) for invoice in invoices]
         
         summary = self._create_summary(results)
         
         return ValidationReport(summary=summary, results=results)
     
+    def validate_stream(self, invoices: Iterable[Invoice]) -> Iterator[InvoiceValidationResult]:
+        """
+        Validate invoices from any iterable, yielding results as they are ready
+        
+        Only STREAM_CHUNK_SIZE invoices and their results are held at a time, so memory stays
+        flat however long the input is. The summary is kept up to date as results are yielded
+        and stored in self.stream_summary once the input is exhausted.
+        """
+        self.stream_summary = None
+        summary = _RunningSummary()
+        invoices = iter(invoices)
+        while chunk := list(islice(invoices, STREAM_CHUNK_SIZE)):
+            if len(chunk) > VECTORIZE_THRESHOLD:
+                # In process: a worker pool per chunk would cost more than it saves
+                results = self._validate_many(chunk, max_workers=1)
+            else:
+                results = [self.validate_invoice(invoice) for invoice in chunk]
+            summary.update(results)
+            yield from results
+        self.stream_summary = summary.finalize()
+    
     def validate_invoice(self, invoice: Invoice) -> InvoiceValidationResult:
         """Validate a single invoice"""
-        invoice_id = invoice.invoice_number or "UNKNOWN"
-        errors = []
-        warnings = []
+        duplicate = self._is_duplicate(invoice.invoice_number, invoice.seller_name, invoice.invoice_date)
+        if duplicate and self.fail_fast_on_duplicate:
+            return self._make_result((), duplicate, invoice.invoice_number)
         
-        # Run all validation rules
-        errors.extend(self._check_completeness_rules(invoice))
-        errors.extend(self._check_format_rules(invoice))
-        errors.extend(self._check_business_rules(invoice))
-        errors.extend(self._check_anomaly_rules(invoice))
+        if not self.cache_results:
+            return self._make_result(self._validate_rules(invoice), duplicate, invoice.invoice_number)
         
-        is_valid = len(errors) == 0
+        key = _result_key(invoice)
+        errors = self._cached_errors(key)
+        if errors is None:
+            errors = self._validate_rules(invoice)
+            self._cache_errors(key, errors)
         
-        return InvoiceValidationResult(
-            invoice_id=invoice_id,
-            is_valid=is_valid,
-            errors=errors,
-            warnings=warnings
-        )
+        return self._make_result(errors, duplicate, invoice.invoice_number)
     
-    def _check_completeness_rules(self, invoice: Invoice) -> List[ValidationError]:
-        """Check completeness rules"""
-        errors = []
+    def _validate_parallel(self, invoices: List[Invoice], workers: int) -> List[Tuple[ValidationError, ...]]:
+        """
+        Validate contiguous shards of the batch in worker processes
+        
+        Like _validate_batch, this runs every rule except duplicate detection.
+        """
+        shard_size = -(-len(invoices) // workers)
+        shards = [invoices[start:start + shard_size] for start in range(0, len(invoices), shard_size)]
+        # Spawned, not forked: the caller may have other threads running (the API uses to_thread)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            validate_shard = partial(_validate_shard, self.tolerance, self.max_amount, self.rel_tolerance)
+            return [result for shard_results in executor.map(validate_shard, shards) for result in shard_results]
+    
+    def _validate_many(self, invoices: List[Invoice], max_workers: Optional[int] = None) -> List[InvoiceValidationResult]:
+        """
+        Validate a large batch (with cache_results, running the rules once per distinct payload not already cached)
+        
+        Duplicate detection runs over the whole batch first, in order; the invoices left over
+        are then validated column-wise, in worker processes if there are enough of them.
+        """
+        duplicate = self._find_duplicates(
+            (inv.invoice_number, inv.seller_name, inv.invoice_date) for inv in invoices
+        ).tolist()
+        fail_fast = self.fail_fast_on_duplicate
+        if not self.cache_results:
+            todo = [invoice for invoice, is_duplicate in zip(invoices, duplicate) if not (fail_fast and is_duplicate)]
+            fresh = iter(self._run_rules(todo, max_workers))
+            return [
+                self._make_result(() if fail_fast and is_duplicate else next(fresh), is_duplicate, invoice.invoice_number)
+                for invoice, is_duplicate in zip(invoices, duplicate)
+            ]
+        
+        # A None key marks a duplicate whose rules are skipped under fail_fast_on_duplicate
+        keys = [
+            None if fail_fast and is_duplicate else _result_key(invoice)
+            for invoice, is_duplicate in zip(invoices, duplicate)
+        ]
+        # Looked up once up front, so results stay available even if the cache evicts them below
+        known = {None: ()}
+        pending = {}
+        for key, invoice in zip(keys, invoices):
+            if key in known or key in pending:
+                continue
+            errors = self._cached_errors(key)
+            if errors is None:
+                pending[key] = invoice
+            else:
+                known[key] = errors
+        
+        if pending:
+            fresh = self._run_rules(list(pending.values()), max_workers)
+            for key, errors in zip(pending, fresh):
+                known[key] = errors
+                self._cache_errors(key, errors)
+        
+        return [
+            self._make_result(known[key], is_duplicate, invoice.invoice_number)
+            for key, is_duplicate, invoice in zip(keys, duplicate, invoices)
+        ]
+    
+    def _run_rules(self, invoices: List[Invoice], max_workers: Optional[int]) -> List[Tuple[ValidationError, ...]]:
+        """Rule errors (without duplicate detection) for each invoice, by the cheapest strategy for the batch size"""
+        workers = min(max_workers or os.cpu_count() or 1, len(invoices) // SHARD_SIZE)
+        if len(invoices) > PARALLEL_THRESHOLD and workers > 1:
+            return self._validate_parallel(invoices, workers)
+        if len(invoices) > VECTORIZE_THRESHOLD:
+            return self._validate_batch(invoices)
+        return [self._validate_rules(invoice) for invoice in invoices]
+    
+    def _validate_batch(self, invoices: List[Invoice]) -> List[Tuple[ValidationError, ...]]:
+        """
+        Validate many invoices at once, without duplicate detection
+        
+        Fields are gathered into columns and every rule is evaluated as a mask over the
+        whole batch; ValidationError objects are only built for flagged invoices.
+        Rules are applied in the same order as _validate_rules, so the results are identical.
+        """
+        n = len(invoices)
+        errors = [[] for _ in range(n)]
+        
+        def emit(mask, rule, message):
+            # A fixed message is built once and shared, like the _E_* errors of the per-invoice rules
+            if isinstance(message, str):
+                error = ValidationError(rule=rule, message=message)
+                for i in np.flatnonzero(mask).tolist():
+                    errors[i].append(error)
+            else:
+                for i in np.flatnonzero(mask).tolist():
+                    errors[i].append(ValidationError(rule=rule, message=message(i)))
+        
+        def column(field):
+            return list(map(attrgetter(field), invoices))
+        
+        def flags(values):
+            return np.fromiter(values, dtype=bool, count=n)
+        
+        def numbers(field):
+            # (present mask, values) - a separate mask, since NaN is itself a possible input
+            values = column(field)
+            return flags(map(is_not, values, repeat(None))), np.array(values, dtype=np.float64)
+        
+        def blank(values):
+            return np.array([not value or not value.strip() for value in values], dtype=bool)
+        
+        invoice_numbers = column("invoice_number")
+        invoice_dates = column("invoice_date")
+        due_dates = column("due_date")
+        seller_names = column("seller_name")
+        buyer_names = column("buyer_name")
+        currencies = column("currency")
+        line_items = column("line_items")
+        has_net, net = numbers("net_total")
+        has_tax, tax = numbers("tax_amount")
+        has_gross, gross = numbers("gross_total")
         
         # Rule 1: Required fields
-        required_fields = {
-            'invoice_number': invoice.invoice_number,
-            'invoice_date': invoice.invoice_date,
-            'seller_name': invoice.seller_name,
-            'buyer_name': invoice.buyer_name,
-        }
-        
-        for field, value in required_fields.items():
-            if not value or (isinstance(value, str) and not value.strip()):
-                errors.append(ValidationError(
-                    rule="required_field",
-                    message=f"Missing required field: {field}"
-                ))
+        emit(blank(invoice_numbers), RULE_REQUIRED_FIELD, "Missing required field: invoice_number")
+        emit(blank(invoice_dates), RULE_REQUIRED_FIELD, "Missing required field: invoice_date")
+        emit(blank(seller_names), RULE_REQUIRED_FIELD, "Missing required field: seller_name")
+        emit(blank(buyer_names), RULE_REQUIRED_FIELD, "Missing required field: buyer_name")
         
         # Rule 2: Party information
-        if invoice.seller_name:
-            if not invoice.seller_address and not invoice.seller_tax_id:
-                errors.append(ValidationError(
-                    rule="party_information",
-                    message="Seller must have address or tax ID"
-                ))
-        
-        if invoice.buyer_name:
-            if not invoice.buyer_address and not invoice.buyer_tax_id:
-                errors.append(ValidationError(
-                    rule="party_information",
-                    message="Buyer must have address or tax ID"
-                ))
+        for names, addresses, tax_ids, party in (
+            (seller_names, column("seller_address"), column("seller_tax_id"), "Seller"),
+            (buyer_names, column("buyer_address"), column("buyer_tax_id"), "Buyer"),
+        ):
+            emit(flags(map(bool, names)) & ~flags(map(bool, addresses)) & ~flags(map(bool, tax_ids)),
+                 RULE_PARTY_INFORMATION, f"{party} must have address or tax ID")
         
         # Rule 3: Financial fields
-        if invoice.net_total is None:
-            errors.append(ValidationError(
-                rule="financial_field",
-                message="Missing net_total"
-            ))
-        
-        if invoice.tax_amount is None:
-            errors.append(ValidationError(
-                rule="financial_field",
-                message="Missing tax_amount"
-            ))
-        
-        if invoice.gross_total is None:
-            errors.append(ValidationError(
-                rule="financial_field",
-                message="Missing gross_total"
-            ))
+        emit(~has_net, RULE_FINANCIAL_FIELD, "Missing net_total")
+        emit(~has_tax, RULE_FINANCIAL_FIELD, "Missing tax_amount")
+        emit(~has_gross, RULE_FINANCIAL_FIELD, "Missing gross_total")
         
         # Rule 4: Currency specification
-        if not invoice.currency or not invoice.currency.strip():
-            errors.append(ValidationError(
-                rule="currency_required",
-                message="Currency must be specified"
-            ))
-        
-        return errors
-    
-    def _check_format_rules(self, invoice: Invoice) -> List[ValidationError]:
-        """Check type/format rules"""
-        errors = []
+        emit(blank(currencies), RULE_CURRENCY_REQUIRED, "Currency must be specified")
         
         # Rule 5: Date format
-        if invoice.invoice_date:
-            if not self._is_valid_date(invoice.invoice_date):
-                errors.append(ValidationError(
-                    rule="date_format",
-                    message=f"Invalid invoice_date format: {invoice.invoice_date}"
-                ))
-        
-        if invoice.due_date:
-            if not self._is_valid_date(invoice.due_date):
-                errors.append(ValidationError(
-                    rule="date_format",
-                    message=f"Invalid due_date format: {invoice.due_date}"
-                ))
+        # Plain YYYY-MM-DD dates are checked in bulk; other ISO forms go through _is_valid_date
+        invoice_plain, invoice_date_ok, invoice_days = _plain_iso_dates(invoice_dates)
+        due_plain, due_date_ok, due_days = _plain_iso_dates(due_dates)
+        for values, plain, date_ok in ((invoice_dates, invoice_plain, invoice_date_ok), (due_dates, due_plain, due_date_ok)):
+            for i in np.flatnonzero(~plain).tolist():
+                date_ok[i] = not values[i] or self._is_valid_date(values[i])
+        emit(~invoice_date_ok, RULE_DATE_FORMAT, lambda i: f"Invalid invoice_date format: {invoice_dates[i]}")
+        emit(~due_date_ok, RULE_DATE_FORMAT, lambda i: f"Invalid due_date format: {due_dates[i]}")
         
         # Rule 6: Currency validation
-        if invoice.currency:
-            if not is_valid_currency(invoice.currency):
-                errors.append(ValidationError(
-                    rule="currency_validation",
-                    message=f"Unknown currency: {invoice.currency}"
-                ))
+        emit(flags(bool(value) and not is_valid_currency(value) for value in currencies),
+             RULE_CURRENCY_VALIDATION, lambda i: f"Unknown currency: {currencies[i]}")
+        
+        # Rules 7, 8, 9 and 12 are pure arithmetic on the amount columns: evaluate them in one kernel
+        # (line-item totals use the same fsum as the scalar rule; a NumPy reduction would round differently)
+        has_items = flags(map(bool, line_items))
+        line_sums = np.fromiter(
+            (_line_items_sum(items) if items else 0.0 for items in line_items),
+            dtype=np.float64, count=n
+        )
+        amount_flags = _kernels.eval_numeric_rules(
+            net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items,
+            float(self.max_amount), float(self.tolerance), float(self.rel_tolerance)
+        )
         
         # Rule 7: Numeric values
-        if invoice.net_total is not None and invoice.net_total < 0:
-            errors.append(ValidationError(
-                rule="numeric_validation",
-                message="net_total cannot be negative"
-            ))
-        
-        if invoice.tax_amount is not None and invoice.tax_amount < 0:
-            errors.append(ValidationError(
-                rule="numeric_validation",
-                message="tax_amount cannot be negative"
-            ))
-        
-        if invoice.gross_total is not None and invoice.gross_total < 0:
-            errors.append(ValidationError(
-                rule="numeric_validation",
-                message="gross_total cannot be negative"
-            ))
-        
-        return errors
-    
-    def _check_business_rules(self, invoice: Invoice) -> List[ValidationError]:
-        """Check business logic rules"""
-        errors = []
+        emit(amount_flags[:, _kernels.NET_NEGATIVE], RULE_NUMERIC_VALIDATION, "net_total cannot be negative")
+        emit(amount_flags[:, _kernels.TAX_NEGATIVE], RULE_NUMERIC_VALIDATION, "tax_amount cannot be negative")
+        emit(amount_flags[:, _kernels.GROSS_NEGATIVE], RULE_NUMERIC_VALIDATION, "gross_total cannot be negative")
         
         # Rule 8: Line items sum
-        if invoice.line_items and invoice.net_total is not None:
-            line_items_sum = sum(item.line_total for item in invoice.line_items)
-            if not calculate_tolerance_match(line_items_sum, invoice.net_total, self.tolerance):
-                errors.append(ValidationError(
-                    rule="line_items_sum",
-                    message=f"Line items sum ({line_items_sum:.2f}) doesn't match net_total ({invoice.net_total:.2f})"
-                ))
+        emit(amount_flags[:, _kernels.LINE_SUM_MISMATCH], RULE_LINE_ITEMS_SUM,
+             lambda i: f"Line items sum ({line_sums[i]:.2f}) doesn't match net_total ({net[i]:.2f})")
         
         # Rule 9: Tax calculation
-        if invoice.net_total is not None and invoice.tax_amount is not None and invoice.gross_total is not None:
-            expected_gross = invoice.net_total + invoice.tax_amount
-            if not calculate_tolerance_match(expected_gross, invoice.gross_total, self.tolerance):
-                errors.append(ValidationError(
-                    rule="tax_calculation",
-                    message=f"net_total + tax_amount ({expected_gross:.2f}) doesn't match gross_total ({invoice.gross_total:.2f})"
-                ))
+        emit(amount_flags[:, _kernels.GROSS_MISMATCH], RULE_TAX_CALCULATION,
+             lambda i: f"net_total + tax_amount ({float(net[i]) + float(tax[i]):.2f}) doesn't match gross_total ({gross[i]:.2f})")
         
         # Rule 10: Due date logic
-        if invoice.invoice_date and invoice.due_date:
-            try:
-                inv_date = datetime.fromisoformat(invoice.invoice_date)
-                due_date = datetime.fromisoformat(invoice.due_date)
-                if due_date < inv_date:
-                    errors.append(ValidationError(
-                        rule="due_date_logic",
-                        message=f"due_date ({invoice.due_date}) is before invoice_date ({invoice.invoice_date})"
-                    ))
-            except ValueError:
-                pass  # Already caught in format rules
-        
-        return errors
-    
-    def _check_anomaly_rules(self, invoice: Invoice) -> List[ValidationError]:
-        """Check for anomalies and duplicates"""
-        errors = []
-        
-        # Rule 11: Duplicate detection
-        invoice_key = (
-            invoice.invoice_number,
-            invoice.seller_name,
-            invoice.invoice_date
-        )
-        
-        if invoice_key in self.seen_invoices:
-            errors.append(ValidationError(
-                rule="duplicate_invoice",
-                message=f"Duplicate invoice detected: {invoice.invoice_number}"
-            ))
-        else:
-            self.seen_invoices.add(invoice_key)
+        both_plain = invoice_plain & due_plain
+        due_before = both_plain & invoice_date_ok & due_date_ok & (due_days < invoice_days)
+        for i in np.flatnonzero(~both_plain).tolist():
+            due_before[i] = self._is_due_before_invoice(invoice_dates[i], due_dates[i])
+        emit(due_before, RULE_DUE_DATE_LOGIC, lambda i: f"due_date ({due_dates[i]}) is before invoice_date ({invoice_dates[i]})")
         
         # Rule 12: Reasonable amounts
-        if invoice.gross_total is not None:
-            if invoice.gross_total <= 0:
-                errors.append(ValidationError(
-                    rule="reasonable_amount",
-                    message="gross_total must be greater than 0"
-                ))
-            elif invoice.gross_total > self.max_amount:
-                errors.append(ValidationError(
-                    rule="reasonable_amount",
-                    message=f"gross_total ({invoice.gross_total:.2f}) exceeds maximum ({self.max_amount:.2f})"
-                ))
+        emit(amount_flags[:, _kernels.GROSS_NOT_POSITIVE], RULE_REASONABLE_AMOUNT, "gross_total must be greater than 0")
+        emit(amount_flags[:, _kernels.GROSS_ABOVE_MAX], RULE_REASONABLE_AMOUNT,
+             lambda i: f"gross_total ({gross[i]:.2f}) exceeds maximum ({self.max_amount:.2f})")
         
+        return [tuple(invoice_errors) for invoice_errors in errors]
+    
+    def _cached_errors(self, key: int) -> Optional[Tuple[ValidationError, ...]]:
+        """Look up cached rule errors, marking them as recently used"""
+        errors = self._result_cache.get(key)
+        if errors is not None:
+            self._result_cache.move_to_end(key)
         return errors
     
-    def _is_valid_date(self, date_str: str) -> bool:
-        """Check if date string is valid ISO format"""
-        try:
-            datetime.fromisoformat(date_str)
+    def _cache_errors(self, key: int, errors: Tuple[ValidationError, ...]):
+        """Cache rule errors, evicting the least recently used entry when full"""
+        self._result_cache[key] = errors
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    def _make_result(self, errors: Tuple[ValidationError, ...], duplicate: bool,
+                     invoice_number: Optional[str]) -> InvoiceValidationResult:
+        """Result for one invoice from its rule errors, with the Rule 11 error added if it is a duplicate"""
+        errors = list(errors)
+        # Rule 11: Duplicate detection (comes right before the rule 12 errors, which are always last)
+        if duplicate:
+            position = len(errors)
+            while position and errors[position - 1].rule == RULE_REASONABLE_AMOUNT:
+                position -= 1
+            errors.insert(position, ValidationError(
+                rule=RULE_DUPLICATE_INVOICE,
+                message=f"Duplicate invoice detected: {invoice_number}"
+            ))
+        return InvoiceValidationResult(
+            invoice_id=invoice_number or "UNKNOWN",
+            is_valid=not errors,
+            errors=errors,
+            warnings=[]
+        )
+    
+    def _is_duplicate(self, invoice_number: Optional[str], seller_name: Optional[str],
+                      invoice_date: Optional[str]) -> bool:
+        """Rule 11: whether this key was seen before (and remember it if not)"""
+        key_hash = _invoice_key_hash((invoice_number, seller_name, invoice_date))
+        if key_hash in self._seen_hashes:
             return True
-        except (ValueError, TypeError):
+        self._seen_hashes.add(key_hash)
+        return False
+    
+    def _find_duplicates(self, invoice_keys) -> np.ndarray:
+        """
+        Rule 11 for a sequence of invoice keys: mask of repeats, in order, sharing state with validate_invoice
+        
+        Repeats within the batch are found by sorting the key hashes (a stable sort keeps each first
+        occurrence ahead of its repeats); only the distinct keys are then looked up in, and added to,
+        the hashes seen by earlier calls.
+        """
+        hashes = np.fromiter(map(_invoice_key_hash, invoice_keys), dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        duplicate = np.zeros(len(hashes), dtype=bool)
+        duplicate[order[1:]] = sorted_hashes[1:] == sorted_hashes[:-1]
+        
+        first = np.flatnonzero(~duplicate)
+        first_hashes = hashes[first].tolist()
+        seen = self._seen_hashes
+        duplicate[first] = np.fromiter(map(seen.__contains__, first_hashes), dtype=bool, count=len(first_hashes))
+        seen.update(first_hashes)
+        return duplicate
+    
+    def _is_due_before_invoice(self, invoice_date: str, due_date: str) -> bool:
+        """Rule 10 check for one invoice; unparseable dates are left to the format rule"""
+        if not invoice_date or not due_date:
             return False
+        inv_date = _parse_date(invoice_date)
+        due = _parse_date(due_date)
+        return inv_date is not None and due is not None and due < inv_date
+    
+    def _is_valid_date(self, date_str: str) -> bool:
+        """Check if date string is valid ISO format"""
+        return _parse_date(date_str) is not None
     
     def _create_summary(self, results: List[InvoiceValidationResult]) -> ValidationSummary:
         """Create aggregated summary from validation results"""
-        total = len(results)
-        valid = sum(1 for r in results if r.is_valid)
-        invalid = total - valid
-        
-        error_counts = {}
-        warning_counts = {}
-        
-        for result in results:
-            for error in result.errors:
-                key = f"{error.rule}: {error.message}"
-                error_counts[key] = error_counts.get(key, 0) + 1
-            
-            for warning in result.warnings:
-                key = f"{warning.rule}: {warning.message}"
-                warning_counts[key] = warning_counts.get(key, 0) + 1
-        
-        return ValidationSummary(
-            total_invoices=total,
-            valid_invoices=valid,
-            invalid_invoices=invalid,
-            error_counts=error_counts,
-            warning_counts=warning_counts
-        )
+        summary = _RunningSummary()
+        summary.update(results)
+        return summary.finalize()
+
+
+def _validate_shard(tolerance: float, max_amount: float, rel_tolerance: float,
+                    invoices: List[Invoice]) -> List[Tuple[ValidationError, ...]]:
+    """Validate one shard in a worker process (duplicates are checked by the parent)"""
+    return InvoiceValidator(tolerance, max_amount, rel_tolerance)._validate_batch(invoices)
@@ -3,7 +3,9 @@ Tests for API endpoints
 """
 import pytest
 from fastapi.testclient import TestClient
+from invoice_qc import api
 from invoice_qc.api import app
+from tests.test_extractor import ORDER_LINES, _write_pdf
 
 client = TestClient(app)
 
@@ -71,3 +73,109 @@ def test_root_endpoint():
     assert response.status_code == 200
     assert "service" in response.json()
     assert "endpoints" in response.json()
+
+
+def test_extract_and_validate_pdfs(tmp_path, monkeypatch):
+    """Test PDF upload endpoint extracts, validates and saves results"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    pdf_file = tmp_path / "order.pdf"
+    _write_pdf(pdf_file, ORDER_LINES)
+    
+    response = client.post(
+        "/extract-and-validate-pdfs",
+        files=[("files", ("order.pdf", pdf_file.read_bytes(), "application/pdf"))],
+    )
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["total_invoices"] == 1
+    assert data["extracted_invoices"][0]["invoice_number"] == "AUFNR1234567"
+    assert data["validation_report"]["summary"]["total_invoices"] == 1
+    assert (tmp_path / "invoices" / "AUFNR1234567.json").exists()
+    assert (tmp_path / "all_invoices.json").exists()
+    assert (tmp_path / "validation_report.json").exists()
+
+
+def test_extract_and_validate_rejects_non_pdf(tmp_path, monkeypatch):
+    """Test PDF upload endpoint rejects other file types"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    
+    response = client.post(
+        "/extract-and-validate-pdfs",
+        files=[("files", ("notes.txt", b"hello", "text/plain"))],
+    )
+    assert response.status_code == 400
+
+
+def test_download_serves_fresh_output(tmp_path, monkeypatch):
+    """Test downloads are served from the output directory and refreshed after a new run"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    api._read_output.cache_clear()
+    
+    assert client.get("/download/all_invoices.json").status_code == 404
+    
+    pdf_file = tmp_path / "order.pdf"
+    _write_pdf(pdf_file, ORDER_LINES)
+    client.post("/extract-and-validate-pdfs", files=[("files", ("order.pdf", pdf_file.read_bytes(), "application/pdf"))])
+    
+    response = client.get("/download/AUFNR1234567.json")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="AUFNR1234567.json"'
+    assert response.json()["invoice_number"] == "AUFNR1234567"
+    assert len(client.get("/download/all_invoices.json").json()) == 1
+    
+    client.post("/extract-and-validate-pdfs", files=[
+        ("files", ("order.pdf", pdf_file.read_bytes(), "application/pdf")),
+        ("files", ("copy.pdf", pdf_file.read_bytes(), "application/pdf")),
+    ])
+    assert len(client.get("/download/all_invoices.json").json()) == 2
+    
+    # Files rewritten outside the API (e.g. by the CLI) are picked up as well
+    (tmp_path / "all_invoices.json").write_text("[]")
+    assert client.get("/download/all_invoices.json").json() == []
+
+
+def test_list_invoices(tmp_path, monkeypatch):
+    """Test invoice listing returns only JSON files"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    assert client.get("/invoices").json() == {"invoices": []}
+    
+    invoices_dir = tmp_path / "invoices"
+    invoices_dir.mkdir()
+    (invoices_dir / "A-1.json").write_text("{}")
+    (invoices_dir / "notes.txt").write_text("")
+    (invoices_dir / "nested.json").mkdir()
+    
+    assert client.get("/invoices").json() == {"invoices": ["A-1.json"], "count": 1}
+
+
+def test_extract_and_validate_keeps_uploads_with_same_filename(tmp_path, monkeypatch):
+    """Test uploads sharing a filename are saved and extracted separately"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    first = tmp_path / "first.pdf"
+    second = tmp_path / "second.pdf"
+    _write_pdf(first, ORDER_LINES)
+    _write_pdf(second, ["Invoice No: INV-2024-77", "Subtotal: 100,00"])
+    
+    response = client.post("/extract-and-validate-pdfs", files=[
+        ("files", ("x.pdf", first.read_bytes(), "application/pdf")),
+        ("files", ("x.pdf", second.read_bytes(), "application/pdf")),
+    ])
+    assert response.status_code == 200
+    
+    numbers = [inv["invoice_number"] for inv in response.json()["extracted_invoices"]]
+    assert numbers == ["AUFNR1234567", "INV-2024-77"]
+    # Uploaded document text is not kept unless TEXT_CACHE_DIR is set
+    assert not list(tmp_path.rglob("*.txt"))
+
+
+def test_download_non_ascii_filename(tmp_path, monkeypatch):
+    """Test files with non-ASCII names are served with an RFC 5987 Content-Disposition"""
+    monkeypatch.setattr(api, "OUTPUT_DIR", tmp_path)
+    (tmp_path / "Rechnung-Müller-€.json").write_text("[]", encoding="utf-8")
+    
+    response = client.get("/download/Rechnung-Müller-€.json")
+    
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename*=utf-8''Rechnung-M%C3%BCller-%E2%82%AC.json"
+    assert response.json() == []
@@ -0,0 +1,176 @@
+"""
+Tests for extraction module
+"""
+import os
+import pytest
+from invoice_qc import extractor
+from invoice_qc.extractor import InvoiceExtractor
+
+
+ORDER_LINES = [
+    "Muster GmbH",
+    "Bestellung AUFNR1234567 vom 22.05.2024",
+    "Kundenanschrift",
+    "Beispiel Kunde AG",
+    "Hauptstrasse 5",
+    "12345 Berlin",
+    "Kundennummer",
+    "100200",
+    "Endkundennummer",
+    "300400",
+    "im Auftrag von 5551234",
+    "Zahlungsbedingungen",
+    "30 Tage netto",
+    "1 Schrauben M8 10 VE 1 12,50 125,00",
+    "2 Muttern 5 VE 2 10,00 50,00",
+    "Gesamtwert EUR 175,00",
+    "MwSt. 19,00% EUR 33,25",
+    "Gesamtwert inkl. MwSt. EUR 208,25",
+]
+
+
+def _escape(text):
+    """Escape text for a PDF string literal"""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(path, lines, columns=()):
+    """
+    Write a minimal single-page PDF containing the given text lines
+    
+    columns optionally adds a table drawn column by column: a list of (x, cells), the cells
+    of each column placed on consecutive rows below the lines.
+    """
+    stream = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+    for line in lines:
+        stream.append(f"({_escape(line)}) Tj T*")
+    stream.append("ET")
+    for x, cells in columns:
+        for row, cell in enumerate(cells):
+            stream.append(f"BT /F1 10 Tf 1 0 0 1 {x} {500 - 12 * row} Tm ({_escape(cell)}) Tj ET")
+    content = "\n".join(stream).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        data += b"%010d 00000 n \n" % offset
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(data))
+
+
+def test_extract_order_document(tmp_path):
+    """Test extraction of a German order document"""
+    pdf_file = tmp_path / "order.pdf"
+    _write_pdf(pdf_file, ORDER_LINES)
+
+    invoice = InvoiceExtractor().extract_from_pdf(str(pdf_file))
+
+    assert invoice.invoice_number == "AUFNR1234567"
+    assert invoice.invoice_date == "2024-05-22"
+    assert invoice.seller_name == "Muster GmbH"
+    assert invoice.buyer_name == "Beispiel Kunde AG"
+    assert invoice.seller_tax_id == "100200"
+    assert invoice.buyer_tax_id == "300400"
+    assert invoice.external_reference == "5551234"
+    assert invoice.payment_terms == "30 Tage netto"
+    assert invoice.net_total == 175.0
+    assert invoice.tax_amount == 33.25
+    assert invoice.gross_total == 208.25
+    assert [item.line_total for item in invoice.line_items] == [125.0, 50.0]
+    assert invoice.line_items[0].description == "Schrauben M8"
+    assert invoice.line_items[0].unit_price == 12.5
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_extract_from_directory_keeps_order_and_skips_failures(tmp_path, monkeypatch, parallel):
+    """Test directory extraction preserves file order, matches .PDF and skips broken PDFs"""
+    if parallel:
+        monkeypatch.setattr(extractor, "PARALLEL_THRESHOLD", 1)
+    _write_pdf(tmp_path / "a.pdf", ORDER_LINES)
+    (tmp_path / "b.pdf").write_bytes(b"not a pdf")
+    _write_pdf(tmp_path / "c.pdf", ["Invoice No: INV-2024-77", "Subtotal: 100,00"])
+    _write_pdf(tmp_path / "d.PDF", ["Invoice No: INV-2024-78", "Subtotal: 100,00"])
+    (tmp_path / "e.txt").write_text("Invoice No: INV-2024-79")
+
+    invoices = InvoiceExtractor().extract_from_directory(str(tmp_path), max_workers=2)
+
+    assert [inv.invoice_number for inv in invoices] == ["AUFNR1234567", "INV-2024-77", "INV-2024-78"]
+
+
+def test_text_cache_skips_parsing_on_repeat(tmp_path, monkeypatch):
+    """Test cached text is reused for a PDF with identical contents"""
+    cache_dir = tmp_path / "cache"
+    _write_pdf(tmp_path / "first.pdf", ORDER_LINES)
+    _write_pdf(tmp_path / "second.pdf", ORDER_LINES)
+    
+    extractor = InvoiceExtractor(text_cache_dir=cache_dir)
+    first = extractor.extract_from_pdf(str(tmp_path / "first.pdf"))
+    assert len(list(cache_dir.glob("*.txt"))) == 1
+    
+    def fail(self, pdf_path):
+        raise AssertionError("PDF was parsed again")
+    monkeypatch.setattr(InvoiceExtractor, "_parse_text", fail)
+    
+    second = extractor.extract_from_pdf(str(tmp_path / "second.pdf"))
+    assert second == first
+
+
+def test_text_cache_drops_entries_past_max_age(tmp_path):
+    """Test directory extraction deletes text cache entries older than text_cache_max_age"""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    stale = cache_dir / "stale.txt"
+    stale.write_text("old document")
+    os.utime(stale, (0, 0))
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    _write_pdf(pdf_dir / "order.pdf", ORDER_LINES)
+    
+    InvoiceExtractor(text_cache_dir=cache_dir, text_cache_max_age=3600).extract_from_directory(str(pdf_dir))
+    
+    assert not stale.exists()
+    assert len(list(cache_dir.glob("*.txt"))) == 1
+
+
+def test_primary_field_scan_without_hyperscan(monkeypatch):
+    """Test the regex scan finds the same fields as the Hyperscan scan"""
+    text = "\n".join(ORDER_LINES) + "\n"
+    expected = extractor._scan_primary_fields(text)
+    monkeypatch.setattr(extractor, "_PRIMARY_DATABASE", None)
+    
+    assert extractor._scan_primary_fields(text) == expected
+    assert expected["order"] == "AUFNR1234567"
+    assert expected["gross"] == "208,25"
+
+
+def test_extract_table_drawn_column_by_column(tmp_path):
+    """Test line items are found when the PDF draws its table one column at a time"""
+    pdf_file = tmp_path / "columns.pdf"
+    _write_pdf(pdf_file, ORDER_LINES[:13] + ORDER_LINES[15:], columns=[
+        (40, ["1", "2"]),
+        (60, ["Schrauben M8", "Muttern"]),
+        (160, ["10 VE", "5 VE"]),
+        (220, ["1", "2"]),
+        (260, ["12,50", "10,00"]),
+        (320, ["125,00", "50,00"]),
+    ])
+    
+    invoice = InvoiceExtractor().extract_from_pdf(str(pdf_file))
+    
+    assert [item.description for item in invoice.line_items] == ["Schrauben M8", "Muttern"]
+    assert [item.line_total for item in invoice.line_items] == [125.0, 50.0]
+    assert invoice.gross_total == 208.25
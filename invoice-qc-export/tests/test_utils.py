@@ -0,0 +1,56 @@
+"""
+Tests for utility functions
+"""
+import json
+from invoice_qc.models import LineItem
+from invoice_qc.utils import extract_amount, parse_date, write_json_many
+
+
+def test_extract_amount_formats():
+    """Test amount parsing for German, US and plain formats"""
+    assert extract_amount("1.234,56") == 1234.56
+    assert extract_amount("1,234.56") == 1234.56
+    assert extract_amount("1234.56") == 1234.56
+    assert extract_amount("123,45") == 123.45
+    assert extract_amount("1,234") == 1234.0
+    assert extract_amount("1.234.567,89") == 1234567.89
+    assert extract_amount("€ 12,50") == 12.5
+
+
+def test_extract_amount_invalid():
+    """Test amount parsing rejects empty and non-numeric input"""
+    assert extract_amount("") is None
+    assert extract_amount(None) is None
+    assert extract_amount("12.50abc") is None
+
+
+def test_parse_date_formats():
+    """Test date parsing for supported formats"""
+    assert parse_date("22.05.2024") == "2024-05-22"
+    assert parse_date("2024-01-10") == "2024-01-10"
+    assert parse_date("03/04/2024") == "2024-04-03"
+    assert parse_date("05/22/2024") == "2024-05-22"
+    assert parse_date("May 22, 2024") == "2024-05-22"
+    assert parse_date("22 May 2024") == "2024-05-22"
+
+
+def test_parse_date_invalid():
+    """Test date parsing rejects impossible and unknown dates"""
+    assert parse_date("31.02.2024") is None
+    assert parse_date("13/13/2024") is None
+    assert parse_date("not a date") is None
+    assert parse_date(None) is None
+
+
+def test_write_json_many(tmp_path):
+    """Test batched JSON writes serialize models and keep the last entry per path"""
+    (tmp_path / "a.json").write_text("x" * 100, encoding="utf-8")
+    item = LineItem(description="Item", quantity=1, unit_price=2.5, line_total=2.5)
+    write_json_many([
+        ({"n": 1}, tmp_path / "a.json"),
+        (item, tmp_path / "b.json"),
+        ({"n": 2}, tmp_path / "a.json"),
+    ])
+    
+    assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8")) == {"n": 2}
+    assert json.loads((tmp_path / "b.json").read_text(encoding="utf-8"))["line_total"] == 2.5
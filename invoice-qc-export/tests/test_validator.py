@@ -1,9 +1,12 @@
 """
 Tests for validation module
 """
+import numpy as np
 import pytest
+from invoice_qc import _kernels
 from invoice_qc.models import Invoice, LineItem
-from invoice_qc.validator import InvoiceValidator
+from invoice_qc.utils import calculate_tolerance_match
+from invoice_qc.validator import InvoiceValidator, _plain_iso_dates
 
 
 def test_valid_invoice():
@@ -164,3 +167,183 @@ def test_duplicate_detection():
     # Second invoice should have duplicate error
     assert report.results[1].errors
     assert any("duplicate_invoice" in err.rule for err in report.results[1].errors)
+
+
+def _mixed_invoices(count):
+    """Deterministic batch covering passing and failing cases of every rule"""
+    invoices = []
+    for i in range(count):
+        net = [100.0, -5.0, None, 70.0, 0.1 + 0.2][i % 5]
+        tax = [10.0, None, 19.0, -1.0][i % 4]
+        gross = [110.0, 0.0, 2000000.0, None, 110.03, float("nan")][i % 6]
+        invoices.append(Invoice(
+            invoice_number=[f"INV-{i % 40}", None, "  "][i % 3],
+            invoice_date=["2024-01-10", "2024-02-30", None, "20240110"][i % 4],
+            due_date=[None, "2024-01-05", "2024-01-25", "not a date", "2024-01-10T12:00"][i % 5],
+            seller_name=["ACME Corp", None, " "][i % 3],
+            seller_address=["123 Main St", None][i % 2],
+            buyer_name=["Client Inc", ""][i % 2],
+            buyer_tax_id=[None, "DE123"][i % 3 % 2],
+            currency=["USD", "XYZ", None, " ", "EUR"][i % 5],
+            net_total=net,
+            tax_amount=tax,
+            gross_total=gross,
+            line_items=[
+                LineItem(description="Item", quantity=1, unit_price=value, line_total=value)
+                for value in [40.0, 30.0, 0.1, 0.2][:i % 5]
+            ],
+        ))
+    return invoices
+
+
+@pytest.mark.parametrize("settings", [
+    {}, {"rel_tolerance": 0.01}, {"max_amount": float("inf")}, {"cache_results": True},
+    {"cache_results": True, "fail_fast_on_duplicate": True}, {"fail_fast_on_duplicate": True},
+])
+def test_batch_matches_single_validation(settings):
+    """Test large batches produce exactly the per-invoice results, for each specialization of the rules"""
+    invoices = _mixed_invoices(120)
+    
+    single = InvoiceValidator(**settings)
+    expected = [single.validate_invoice(invoice) for invoice in invoices]
+    
+    report = InvoiceValidator(**settings).validate_invoices(invoices)
+    
+    assert report.results == expected
+    assert any(err.rule == "duplicate_invoice" for result in report.results for err in result.errors)
+
+
+@pytest.mark.parametrize("rel_tolerance", [0.0, 1e-6])
+def test_numeric_kernel_matches_numpy_fallback(rel_tolerance):
+    """Test the loop amount-rule kernel (compiled if Numba is installed) agrees with NumPy, including NaN/inf"""
+    rng = np.random.default_rng(0)
+    values = np.array([0.0, -0.01, 10.0, 110.0, 110.02, 110.03, 1e6, 1e6 + 1, np.nan, np.inf, -np.inf])
+    net, tax, gross, line_sums = (rng.choice(values, 500) for _ in range(4))
+    has_net, has_tax, has_gross, has_items = (rng.random(500) < 0.8 for _ in range(4))
+    args = (net, tax, gross, line_sums, has_net, has_tax, has_gross, has_items, 1e6, 0.02, rel_tolerance)
+    
+    expected = _kernels._eval_numeric_rules_numpy(*args)
+    
+    kernel = _kernels._eval_numeric_rules_jit or _kernels._eval_numeric_rules_loop
+    assert np.array_equal(kernel(*args), expected)
+    assert np.array_equal(_kernels.eval_numeric_rules(*args), expected)
+    assert expected.any(axis=0).all()
+
+
+def test_plain_iso_dates():
+    """Test bulk date checking agrees with datetime.fromisoformat on plain dates"""
+    values = ["2024-02-29", "2023-02-29", "2024-13-01", "0000-01-01", "2024-01-10T10:00", None, "2024-04-31"]
+    
+    plain, valid, days = _plain_iso_dates(values)
+    
+    assert plain.tolist() == [True, True, True, True, False, False, True]
+    assert valid.tolist() == [True, False, False, False, False, False, False]
+    assert days[0] == np.datetime64("2024-02-29")
+
+
+def test_parallel_batch_matches_single_validation(monkeypatch):
+    """Test sharded validation across worker processes keeps duplicates and error order"""
+    # The batch has only 80 distinct payloads, so lower the limits far enough to reach the pool
+    monkeypatch.setattr("invoice_qc.validator.PARALLEL_THRESHOLD", 40)
+    monkeypatch.setattr("invoice_qc.validator.SHARD_SIZE", 20)
+    invoices = _mixed_invoices(1200)
+    
+    single = InvoiceValidator()
+    expected = [single.validate_invoice(invoice) for invoice in invoices]
+    
+    report = InvoiceValidator().validate_invoices(invoices, max_workers=2)
+    
+    assert report.results == expected
+
+
+def test_duplicate_key_distinguishes_missing_fields():
+    """Test duplicate keys treat None, empty and shifted field values as different invoices"""
+    validator = InvoiceValidator()
+    invoices = [
+        Invoice(invoice_number="INV-1", seller_name=None, invoice_date="2024-01-10"),
+        Invoice(invoice_number="INV-1", seller_name="", invoice_date="2024-01-10"),
+        Invoice(invoice_number="INV-1|", seller_name="", invoice_date="2024-01-10"),
+        Invoice(invoice_number="INV-1", seller_name="|", invoice_date="2024-01-10"),
+        Invoice(invoice_number="INV-1", seller_name=None, invoice_date="2024-01-10"),
+    ]
+    
+    results = [validator.validate_invoice(invoice) for invoice in invoices]
+    
+    assert [any(err.rule == "duplicate_invoice" for err in r.errors) for r in results] == [False, False, False, False, True]
+
+
+def test_repeated_payload_reuses_cached_rules(monkeypatch):
+    """Test a re-submitted invoice skips the rules but is still flagged as a duplicate, and NaN doesn't hit a missing amount"""
+    validator = InvoiceValidator(cache_results=True)
+    invoice = Invoice(invoice_number="INV-9", seller_name="ACME", invoice_date="2024-01-10", gross_total=-5.0)
+    first = validator.validate_invoice(invoice)
+    validator.validate_invoice(invoice.model_copy(update={"gross_total": None}))
+    
+    def fail(invoice):
+        raise AssertionError("rules were evaluated again")
+    monkeypatch.setattr(validator, "_validate_rules", fail)
+    
+    second = validator.validate_invoice(invoice.model_copy(update={"payment_terms": "30 days"}))
+    
+    assert [err.rule for err in second.errors] == [err.rule for err in first.errors][:-1] + ["duplicate_invoice", "reasonable_amount"]
+    with pytest.raises(AssertionError):
+        validator.validate_invoice(invoice.model_copy(update={"gross_total": float("nan")}))
+
+
+def test_relative_tolerance_allows_rounding_on_large_totals():
+    """Test rel_tolerance widens the tax match for large amounts, while inf still never matches"""
+    invoice = Invoice(net_total=900000.0, tax_amount=99999.0, gross_total=1000000.0)
+    
+    def tax_rule_fails(validator):
+        return any(err.rule == "tax_calculation" for err in validator.validate_invoice(invoice).errors)
+    
+    assert tax_rule_fails(InvoiceValidator())
+    assert not tax_rule_fails(InvoiceValidator(rel_tolerance=1e-6))
+    assert not calculate_tolerance_match(float("inf"), float("inf"), 0.02, 1e-6)
+
+
+def test_fail_fast_on_duplicate_reports_only_the_duplicate():
+    """Test fail_fast_on_duplicate skips the other rules for duplicates, in both the single and batch paths"""
+    invoices = [Invoice(invoice_number=f"INV-{i % 20}", currency="XYZ") for i in range(40)]
+    
+    single = InvoiceValidator(fail_fast_on_duplicate=True)
+    expected = [single.validate_invoice(invoice) for invoice in invoices]
+    report = InvoiceValidator(fail_fast_on_duplicate=True).validate_invoices(invoices)
+    
+    assert report.results == expected
+    assert [err.rule for err in expected[20].errors] == ["duplicate_invoice"]
+    assert len(expected[0].errors) > 1
+
+
+def test_is_valid_date_accepts_iso_forms_and_rejects_others():
+    """Test date validation matches datetime.fromisoformat without raising for any input"""
+    validator = InvoiceValidator()
+    
+    for value in ["2024-01-10", "20240110", "2024-W02-3", "2024-01-10T10:00:00"]:
+        assert validator._is_valid_date(value), value
+    for value in ["2024-02-30", "10.01.2024", "abc", " 2024-01-10", "", None, 20240110]:
+        assert not validator._is_valid_date(value), value
+
+
+def test_validate_stream_matches_batch_report(monkeypatch):
+    """Test streaming validation over a generator yields the same results and summary as a batch"""
+    monkeypatch.setattr("invoice_qc.validator.STREAM_CHUNK_SIZE", 50)
+    invoices = _mixed_invoices(180)
+    expected = InvoiceValidator().validate_invoices(invoices)
+    
+    validator = InvoiceValidator()
+    results = list(validator.validate_stream(invoice for invoice in invoices))
+    
+    assert results == expected.results
+    assert validator.stream_summary == expected.summary
+
+
+def test_find_duplicates_flags_repeats_after_first_occurrence():
+    """Test batch duplicate detection keeps first occurrences and remembers keys from earlier calls"""
+    validator = InvoiceValidator()
+    validator.validate_invoice(Invoice(invoice_number="A", seller_name="S", invoice_date="2024-01-10"))
+    keys = [("B", "S", "2024-01-10"), ("A", "S", "2024-01-10"), ("C", None, None), ("B", "S", "2024-01-10"), ("C", None, None)]
+    
+    assert validator._find_duplicates(keys).tolist() == [False, True, False, True, True]
+    assert validator._find_duplicates(keys[:1]).tolist() == [True]
+    assert validator._find_duplicates([]).tolist() == []